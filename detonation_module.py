@@ -3,6 +3,11 @@ import sqlite3, json, time, logging, uuid, os, threading
 from datetime import datetime
 from google.cloud import compute_v1, storage, pubsub_v1
 
+try:
+    from main import get_module
+except ImportError:
+    get_module = lambda module_name: None
+
 # Set up logger
 logger = logging.getLogger(__name__)
 
@@ -24,8 +29,9 @@ def init_app(app):
         os.makedirs('static/js', exist_ok=True)
         os.makedirs('templates', exist_ok=True)
         
-        # Generate templates
-        generate_templates()
+        # Generate templates - images built with 'flask init-assets' already ship them
+        if app.config.get('GENERATE_TEMPLATES', False):
+            generate_templates()
         
         # Initialize GCP environment variables if not set
         if 'GCP_PROJECT_ID' not in app.config or not app.config['GCP_PROJECT_ID']:
@@ -182,7 +188,6 @@ def create():
         return redirect(url_for('malware.index'))
     
     try:
-        from main import get_module
         malware_module = get_module('malware')
         if malware_module:
             sample = malware_module.get_malware_by_id(sample_id)
@@ -230,7 +235,6 @@ def view(job_id):
             flash('Detonation job not found', 'error')
             return redirect(url_for('detonation.index'))
         
-        from main import get_module
         malware_module = get_module('malware')
         if malware_module:
             sample = malware_module.get_malware_by_id(job['sample_id'])
@@ -333,7 +337,6 @@ def create_detonation_job(sample_id, vm_type):
     
     # Start VM deployment using instance template
     try:
-        from main import get_module
         malware_module = get_module('malware')
         if malware_module:
             sample = malware_module.get_malware_by_id(sample_id)
@@ -700,7 +703,6 @@ def process_detonation_results(job_id, results_path):
             # Generate visualization data if configured
             if current_app.config.get('ENABLE_VISUALIZATION', True):
                 try:
-                    from main import get_module
                     viz_module = get_module('viz')
                     if viz_module and hasattr(viz_module, 'create_visualization_from_data'):
                         viz_module.create_visualization_from_data(job_id, summary_data)
@@ -824,18 +826,20 @@ def delete_detonation_job(job_id):
         conn.close()
 
 # Database retrieval operations
-def get_detonation_jobs():
-    """Get a list of all detonation jobs"""
+def get_detonation_jobs(limit=None):
+    """Get a list of detonation jobs, newest first, optionally only the first `limit`"""
     try:
         conn = _db_connection(sqlite3.Row)
         cursor = conn.cursor()
         
+        # LIMIT -1 means no limit in SQLite, so one statement serves both cases
         cursor.execute("""
             SELECT j.*, s.name as sample_name, s.sha256 as sample_sha256
             FROM detonation_jobs j
             JOIN malware_samples s ON j.sample_id = s.id
             ORDER BY j.created_at DESC
-        """)
+            LIMIT ?
+        """, (-1 if limit is None else limit,))
         jobs = [dict(row) for row in cursor.fetchall()]
         
         conn.close()
@@ -1227,11 +1231,19 @@ def generate_templates():
 
 {% block scripts %}
 <script>
-    // Auto-refresh for running jobs
+    // Auto-refresh for running jobs, deferred while the tab is in the background
     {% if job.status in ['queued', 'deploying', 'running'] %}
+    let refreshDue = false;
     setTimeout(function() {
-        window.location.reload();
+        if (document.hidden) {
+            refreshDue = true;
+        } else {
+            window.location.reload();
+        }
     }, 30000);
+    document.addEventListener('visibilitychange', function() {
+        if (refreshDue && !document.hidden) window.location.reload();
+    });
     {% endif %}
 </script>
 {% endblock %}""",
@@ -1326,8 +1338,18 @@ def generate_templates():
     }
     
     # Create templates if they don't exist
+    # One directory scan instead of a stat() per template
+    with os.scandir('templates') as entries:
+        existing = {entry.name for entry in entries}
     for filename, content in templates.items():
-        if not os.path.exists(f'templates/{filename}'):
-            with open(f'templates/{filename}', 'w') as f:
-                f.write(content)
-            logger.info(f"Created template: {filename}")
+        if filename not in existing:
+            # O_EXCL turns a concurrent worker's write into a no-op instead of a rewrite
+            try:
+                fd = os.open(f'templates/{filename}', os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                continue
+            try:
+                os.write(fd, content.encode('utf-8'))
+            finally:
+                os.close(fd)
+            logger.info("Created template: %s", filename)
@@ -1,6 +1,7 @@
-from flask import Flask, render_template, jsonify, g, request, redirect, url_for, flash
+from flask import Flask, render_template, jsonify, g, request, redirect, url_for, flash, current_app
 import os
 import logging
+import sqlite3
 import importlib
 import time
 import sys
@@ -8,6 +9,8 @@ import traceback
 from pathlib import Path
 import json
 from flask_login import LoginManager, current_user, login_required
+from markupsafe import escape
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Configure logging with more detailed format
 logging.basicConfig(level=logging.INFO, 
@@ -64,71 +67,92 @@ def get_module(module_name):
         MODULES[module_name]['error'] = error_msg
         return None
 
-def handle_not_found(e):
-    """Handle 404 errors gracefully with custom page"""
-    logger.warning(f"404 error: {request.path} not found")
-    try:
-        return render_template('error.html', 
-                              error_code=404,
-                              error_message="The requested page was not found."), 404
-    except Exception as template_error:
-        logger.error(f"Error rendering 404 template: {template_error}")
-        return f"""
+# Static parts of the 404 fallback page, built once; only the escaped path varies
+_NOT_FOUND_PREFIX = b"""
         <!DOCTYPE html>
         <html>
         <head>
             <title>Not Found</title>
             <style>
-                body {{ font-family: Arial, sans-serif; text-align: center; margin-top: 50px; }}
-                h1 {{ color: #dc3545; }}
-                a {{ color: #4a6fa5; text-decoration: none; }}
-                a:hover {{ text-decoration: underline; }}
+                body { font-family: Arial, sans-serif; text-align: center; margin-top: 50px; }
+                h1 { color: #dc3545; }
+                a { color: #4a6fa5; text-decoration: none; }
+                a:hover { text-decoration: underline; }
             </style>
         </head>
         <body>
             <h1>404 - Page Not Found</h1>
-            <p>The requested URL {request.path} was not found on this server.</p>
+            <p>The requested URL """
+_NOT_FOUND_SUFFIX = b""" was not found on this server.</p>
             <p><a href="/">Return to Home</a></p>
         </body>
         </html>
-        """, 404
+        """
+_HTML_HEADERS = {'Content-Type': 'text/html; charset=utf-8'}
 
-def handle_server_error(e):
-    """Handle 500 errors with helpful context"""
-    error_traceback = traceback.format_exc()
-    logger.error(f"Server error: {str(e)}\n{error_traceback}")
-    
-    try:
-        return render_template('error.html', 
-                              error_code=500,
-                              error_message=f"Server error: {str(e)}",
-                              error_details=error_traceback), 500
-    except Exception:
-        # Fallback to basic HTML if template rendering fails
-        return f"""
+# Static parts of the 500 fallback page; the error and traceback are only filled in under DEBUG
+_SERVER_ERROR_PREFIX = b"""
         <!DOCTYPE html>
         <html>
         <head>
             <title>Server Error</title>
             <style>
-                body {{ font-family: Arial, sans-serif; text-align: center; margin-top: 50px; }}
-                h1 {{ color: #dc3545; }}
-                .error-details {{ text-align: left; background: #f8f9fa; padding: 15px; margin: 20px; overflow: auto; }}
-                a {{ color: #4a6fa5; text-decoration: none; }}
-                a:hover {{ text-decoration: underline; }}
+                body { font-family: Arial, sans-serif; text-align: center; margin-top: 50px; }
+                h1 { color: #dc3545; }
+                .error-details { text-align: left; background: #f8f9fa; padding: 15px; margin: 20px; overflow: auto; }
+                a { color: #4a6fa5; text-decoration: none; }
+                a:hover { text-decoration: underline; }
             </style>
         </head>
         <body>
             <h1>500 - Server Error</h1>
             <p>The server encountered an internal error.</p>
             <div class="error-details">
-                <p><strong>Error:</strong> {str(e)}</p>
-                <pre>{error_traceback}</pre>
+                <p><strong>Error:</strong> """
+_SERVER_ERROR_MIDDLE = b"""</p>
+                <pre>"""
+_SERVER_ERROR_SUFFIX = b"""</pre>
             </div>
             <p><a href="/">Return to Home</a></p>
         </body>
         </html>
-        """, 500
+        """
+_SERVER_ERROR_PAGE = _SERVER_ERROR_PREFIX + b"Internal error" + _SERVER_ERROR_MIDDLE + _SERVER_ERROR_SUFFIX
+
+def handle_not_found(e):
+    """Handle 404 errors gracefully with custom page"""
+    logger.warning("404 error: %s not found", request.path)
+    try:
+        web_module = get_module('web')
+        if web_module and hasattr(web_module, 'render_error_page'):
+            return web_module.render_error_page(404, "The requested page was not found."), 404
+        return render_template('error.html', 
+                              error_code=404,
+                              error_message="The requested page was not found."), 404
+    except Exception as template_error:
+        logger.error(f"Error rendering 404 template: {template_error}")
+        body = _NOT_FOUND_PREFIX + str(escape(request.path)).encode('utf-8') + _NOT_FOUND_SUFFIX
+        return body, 404, _HTML_HEADERS
+
+def handle_server_error(e):
+    """Handle 500 errors with helpful context"""
+    # Let logging format the traceback; only build the string when it is shown
+    logger.error("Server error: %s", e, exc_info=True)
+    debug_mode = current_app.config.get('DEBUG', False)
+    error_traceback = traceback.format_exc() if debug_mode else ''
+    
+    try:
+        return render_template('error.html', 
+                              error_code=500,
+                              error_message=f"Server error: {str(e)}" if debug_mode else "The server encountered an internal error.",
+                              error_details=error_traceback or None), 500
+    except Exception:
+        # Fallback to basic HTML if template rendering fails
+        if not debug_mode:
+            return _SERVER_ERROR_PAGE, 500, _HTML_HEADERS
+        body = (_SERVER_ERROR_PREFIX + str(escape(str(e))).encode('utf-8') + _SERVER_ERROR_MIDDLE
+                + str(escape(error_traceback)).encode('utf-8') + _SERVER_ERROR_SUFFIX)
+        return body, 500, _HTML_HEADERS
 
 def ensure_directories():
     """Ensure all required directories exist for application.
@@ -157,16 +181,17 @@ def ensure_directories():
         except Exception as e:
             logger.error(f"Error creating directory {directory}: {e}")
 
-def ensure_base_templates():
+def ensure_base_templates(app=None):
     """Ensure base templates exist by leveraging web_interface module.
     
-    Falls back to creating minimal templates directly if the module fails.
+    The web module serves its bundled templates from memory, so nothing is
+    written to disk unless it fails and the minimal fallbacks are needed.
     """
     try:
         # Try to use the web module's function
         web_module = get_module('web')
         if web_module and hasattr(web_module, 'generate_base_templates'):
-            web_module.generate_base_templates()
+            web_module.generate_base_templates(app)
             logger.info("Base templates have been created or verified by web module")
             return
     except Exception as e:
@@ -329,7 +354,7 @@ def initialize_modules(app):
             except Exception as e:
                 error_msg = f"Error initializing module {module_name}: {str(e)}"
                 logger.error(error_msg)
-                logger.debug(traceback.format_exc())
+                logger.debug("Module %s initialization traceback", module_name, exc_info=True)
                 
                 module_info['initialized'] = False
                 module_info['error'] = error_msg
@@ -367,10 +392,19 @@ def create_app(test_config=None):
             'INITIALIZE_GCP': os.environ.get('INITIALIZE_GCP', 'False').lower() in ('true', '1', 't'),
             'SKIP_DB_INIT': os.environ.get('SKIP_DB_INIT', 'False').lower() in ('true', '1', 't'),
             'START_TIME': start_time,
+            # 'argon2' or a Werkzeug method such as 'scrypt' / 'pbkdf2:sha256:100000'
+            'PASSWORD_HASH_METHOD': os.environ.get('PASSWORD_HASH_METHOD'),
             # Add critical for login
-            'SECRET_KEY': os.environ.get('SECRET_KEY', os.urandom(24).hex())
+            'SECRET_KEY': os.environ.get('SECRET_KEY', os.urandom(24).hex()),
+            # Proxies in front of the app (Cloud Run's front end by default) whose
+            # X-Forwarded-For is trusted for request.remote_addr; 0 disables
+            'TRUSTED_PROXY_HOPS': int(os.environ.get('TRUSTED_PROXY_HOPS', 1))
         })
         
+        # Let remote_addr be the client rather than the proxy, e.g. for login throttling
+        if app.config['TRUSTED_PROXY_HOPS'] > 0:
+            app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'])
+        
         # Set MAX_CONTENT_LENGTH based on MAX_UPLOAD_SIZE_MB
         app.config['MAX_CONTENT_LENGTH'] = app.config['MAX_UPLOAD_SIZE_MB'] * 1024 * 1024
         
@@ -411,7 +445,6 @@ def create_app(test_config=None):
                     
                 # Ultimate fallback - try direct SQLite access
                 try:
-                    import sqlite3
                     conn = sqlite3.connect(app.config['DATABASE_PATH'])
                     conn.row_factory = sqlite3.Row
                     cursor = conn.cursor()
@@ -447,7 +480,7 @@ def create_app(test_config=None):
             return None
         
         # Ensure basic templates exist before anything else
-        ensure_base_templates()
+        ensure_base_templates(app)
         
         # Initialize database early to ensure it exists
         if not app.config.get('SKIP_DB_INIT', False):
@@ -466,8 +499,15 @@ def create_app(test_config=None):
             return response
         
         # Register health check endpoint
+        # Probes can hit /health several times a second; reuse the last body briefly
+        health_cache = {'expires': 0.0, 'body': None}
+        
         @app.route('/health')
         def health_check():
+            now = time.time()
+            if now < health_cache['expires']:
+                return app.response_class(health_cache['body'], mimetype='application/json')
+            
             # Build comprehensive health data
             health_data = {
                 "status": "healthy",
@@ -483,7 +523,6 @@ def create_app(test_config=None):
             
             # Check database health
             try:
-                import sqlite3
                 conn = sqlite3.connect(app.config.get('DATABASE_PATH'))
                 cursor = conn.cursor()
                 cursor.execute("SELECT 1")
@@ -500,16 +539,38 @@ def create_app(test_config=None):
                     health_data["status"] = "degraded"
                     break
             
-            return jsonify(health_data)
+            # Stored encoded so cached hits hand WSGI the bytes as-is
+            health_cache['body'] = json.dumps(health_data, separators=(',', ':'), sort_keys=True).encode('utf-8')
+            health_cache['expires'] = now + app.config.get('HEALTH_CACHE_SECONDS', 2)
+            return app.response_class(health_cache['body'], mimetype='application/json')
+        
+        # While the cached body is fresh, answer probes before Flask's routing,
+        # sessions and request hooks get involved
+        flask_wsgi_app = app.wsgi_app
+        
+        def health_fast_path(environ, start_response):
+            if environ.get('PATH_INFO') == '/health' and environ.get('REQUEST_METHOD') in ('GET', 'HEAD'):
+                body = health_cache['body']
+                if body is not None and time.time() < health_cache['expires']:
+                    start_response('200 OK', [('Content-Type', 'application/json'),
+                                              ('Content-Length', str(len(body)))])
+                    return [body] if environ['REQUEST_METHOD'] == 'GET' else []
+            return flask_wsgi_app(environ, start_response)
+        
+        app.wsgi_app = health_fast_path
         
         # Initialize modules in the defined order
         try:
             initialize_modules(app)
         except Exception as e:
-            logger.error(f"Critical error during module initialization: {e}")
-            logger.error(traceback.format_exc())
+            logger.error("Critical error during module initialization: %s", e, exc_info=True)
             # Continue with limited functionality
         
+        # Compile templates once every module has written its own
+        web_module = get_module('web')
+        if web_module and hasattr(web_module, 'warm_template_cache'):
+            web_module.warm_template_cache(app)
+        
         # Add alternate routes for the root path to handle edge cases
         @app.route('/index')
         @app.route('/home')
@@ -519,17 +580,31 @@ def create_app(test_config=None):
             return redirect(url_for('web.index'))
         
         # Diagnostic route for debugging
+        # Config is settled once startup finishes, so stringify it on first use only
+        debug_config = {}
+        
+        def list_dir(path):
+            """Directory listing in one syscall; None when the directory is missing"""
+            try:
+                return os.listdir(path)
+            except OSError:
+                return None
+        
         @app.route('/debug-info')
         def debug_info():
             """Endpoint for debugging template and module issues"""
+            if not debug_config:
+                debug_config.update({k: str(v) for k, v in app.config.items() if k != 'SECRET_KEY'})
+            template_files = list_dir(app.template_folder)
+            static_files = list_dir(app.static_folder)
             debug_data = {
-                'app_config': {k: str(v) for k, v in app.config.items() if k != 'SECRET_KEY'},
+                'app_config': debug_config,
                 'template_dir': app.template_folder,
                 'static_dir': app.static_folder,
-                'template_dir_exists': os.path.exists(app.template_folder),
-                'static_dir_exists': os.path.exists(app.static_folder),
-                'template_files': os.listdir(app.template_folder) if os.path.exists(app.template_folder) else [],
-                'static_files': os.listdir(app.static_folder) if os.path.exists(app.static_folder) else [],
+                'template_dir_exists': template_files is not None,
+                'static_dir_exists': static_files is not None,
+                'template_files': template_files or [],
+                'static_files': static_files or [],
                 'module_status': {name: {
                     "initialized": info.get("initialized", False),
                     "error": info.get("error", None)
@@ -566,40 +641,43 @@ def create_app(test_config=None):
         # Create a simplified fallback emergency application
         emergency_app = Flask(__name__)
         
+        # The failure details never change, so render the emergency page once
+        emergency_page = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Malware Detonation Platform - Emergency Mode</title>
+            <style>
+                body {{ font-family: Arial, sans-serif; margin: 40px; }}
+                h1 {{ color: #dc3545; }}
+                .error-card {{ background: #f8d7da; padding: 20px; border-radius: 8px; margin-top: 20px; }}
+                .links {{ margin-top: 30px; }}
+                .links a {{ display: inline-block; margin: 5px; padding: 8px 16px; color: white; 
+                          background-color: #4a6fa5; text-decoration: none; border-radius: 4px; }}
+                pre {{ background: #f8f9fa; padding: 15px; border-radius: 5px; overflow: auto; max-height: 300px; }}
+            </style>
+        </head>
+        <body>
+            <h1>Malware Detonation Platform - Emergency Mode</h1>
+            <p>The application is running in emergency mode due to critical initialization errors.</p>
+            
+            <div class="error-card">
+                <h2>Error Details</h2>
+                <p>{escape(str(e))}</p>
+                <pre>{escape(error_details)}</pre>
+            </div>
+            
+            <div class="links">
+                <a href="/health">Health Check</a>
+                <a href="/debug-info">Debug Info</a>
+            </div>
+        </body>
+        </html>
+        """
+        
         @emergency_app.route('/')
         def emergency_home():
-            return f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Malware Detonation Platform - Emergency Mode</title>
-                <style>
-                    body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                    h1 {{ color: #dc3545; }}
-                    .error-card {{ background: #f8d7da; padding: 20px; border-radius: 8px; margin-top: 20px; }}
-                    .links {{ margin-top: 30px; }}
-                    .links a {{ display: inline-block; margin: 5px; padding: 8px 16px; color: white; 
-                              background-color: #4a6fa5; text-decoration: none; border-radius: 4px; }}
-                    pre {{ background: #f8f9fa; padding: 15px; border-radius: 5px; overflow: auto; max-height: 300px; }}
-                </style>
-            </head>
-            <body>
-                <h1>Malware Detonation Platform - Emergency Mode</h1>
-                <p>The application is running in emergency mode due to critical initialization errors.</p>
-                
-                <div class="error-card">
-                    <h2>Error Details</h2>
-                    <p>{str(e)}</p>
-                    <pre>{error_details}</pre>
-                </div>
-                
-                <div class="links">
-                    <a href="/health">Health Check</a>
-                    <a href="/debug-info">Debug Info</a>
-                </div>
-            </body>
-            </html>
-            """
+            return emergency_page
             
         @emergency_app.route('/health')
         def emergency_health():
@@ -10,6 +10,11 @@ from werkzeug.utils import secure_filename
 from google.cloud import storage
 from google.cloud.exceptions import NotFound
 
+try:
+    from main import get_module
+except ImportError:
+    get_module = lambda module_name: None
+
 # Set up logger
 logger = logging.getLogger(__name__)
 
@@ -262,10 +267,9 @@ def view(sample_id):
         # Get tags for this sample
         tags = get_sample_tags(sample_id)
         
-        # Get list of detonation jobs for this sample - lazy import
+        # Get list of detonation jobs for this sample
         detonation_jobs = []
         try:
-            from main import get_module
             detonation_module = get_module('detonation')
             if detonation_module and hasattr(detonation_module, 'get_jobs_for_sample'):
                 detonation_jobs = detonation_module.get_jobs_for_sample(sample_id)
@@ -724,8 +728,21 @@ def delete_from_gcs(storage_path):
 
 def get_datasets():
     """Get list of datasets (for dashboard)"""
-    # This is a helper function referenced by web_interface
-    return get_recent_samples(5)  # Just return the 5 most recent samples
+    # This is a helper function referenced by web_interface. It reads only the
+    # 5 most recent samples and the columns the dashboard shows, with the hash
+    # already cut to the 10-character prefix it displays. sha256 itself is kept
+    # for the template's fallback when short_sha comes back empty
+    conn = _db_connection(sqlite3.Row)
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        "SELECT id, name, created_at, file_type, sha256, substr(sha256, 1, 10) AS short_sha "
+        "FROM malware_samples ORDER BY created_at DESC LIMIT 5"
+    )
+    samples = [dict(row) for row in cursor.fetchall()]
+    
+    conn.close()
+    return samples
 
 # Template generation functions
 def generate_css():
@@ -750,8 +767,8 @@ def generate_css():
     
     # Write CSS to file
     os.makedirs('static/css', exist_ok=True)
-    with open('static/css/malware_module.css', 'w') as f:
-        f.write(css)
+    with open('static/css/malware_module.css', 'wb') as f:
+        f.write(css.encode('utf-8'))
     logger.info("Created malware CSS file")
 
 def generate_js():
@@ -788,8 +805,8 @@ def generate_js():
     
     # Write JS to file
     os.makedirs('static/js', exist_ok=True)
-    with open('static/js/malware_module.js', 'w') as f:
-        f.write(js)
+    with open('static/js/malware_module.js', 'wb') as f:
+        f.write(js.encode('utf-8'))
     logger.info("Created malware JS file")
 
 def generate_templates():
@@ -1083,8 +1100,18 @@ def generate_templates():
     }
     
     # Write templates to files
+    # One directory scan instead of a stat() per template
+    with os.scandir('templates') as entries:
+        existing = {entry.name for entry in entries}
     for name, content in templates.items():
-        if not os.path.exists(f'templates/{name}'):
-            with open(f'templates/{name}', 'w') as f:
-                f.write(content)
-            logger.info(f"Created template: {name}")
+        if name not in existing:
+            # O_EXCL turns a concurrent worker's write into a no-op instead of a rewrite
+            try:
+                fd = os.open(f'templates/{name}', os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                continue
+            try:
+                os.write(fd, content.encode('utf-8'))
+            finally:
+                os.close(fd)
+            logger.info("Created template: %s", name)
@@ -0,0 +1,32 @@
+"""Tests for password verification and lazy rehashing in web_interface"""
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+import web_interface
+
+
+def _app(method):
+    app = Flask(__name__)
+    app.config['PASSWORD_HASH_METHOD'] = method
+    return app
+
+
+def test_pbkdf2_hash_is_rehashed_when_scrypt_is_configured():
+    stored = generate_password_hash('secret', method='pbkdf2:sha256:100000')
+    with _app('scrypt').app_context():
+        assert web_interface.verify_password(stored, 'secret') == (True, True)
+        rehashed = web_interface.hash_password('secret')
+        assert rehashed.startswith('scrypt:')
+        assert web_interface.verify_password(rehashed, 'secret') == (True, False)
+
+
+def test_matching_werkzeug_method_is_not_rehashed():
+    stored = generate_password_hash('secret', method='pbkdf2:sha256:100000')
+    with _app('pbkdf2:sha256:100000').app_context():
+        assert web_interface.verify_password(stored, 'secret') == (True, False)
+
+
+def test_wrong_password_is_never_rehashed():
+    stored = generate_password_hash('secret', method='pbkdf2:sha256:100000')
+    with _app('scrypt').app_context():
+        assert web_interface.verify_password(stored, 'wrong') == (False, False)
@@ -4,7 +4,11 @@ import json
 import sqlite3
 import logging
 from datetime import datetime
-import traceback
+
+try:
+    from main import get_module
+except ImportError:
+    get_module = lambda module_name: None
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -165,7 +169,6 @@ def create():
     # If no result_id, show selection page
     if not result_id:
         try:
-            from main import get_module
             malware_module = get_module('malware')
             recent_results = []
             if malware_module and hasattr(malware_module, 'get_recent_samples'):
@@ -180,7 +183,6 @@ def create():
     
     # Load sample data
     try:
-        from main import get_module
         malware_module = get_module('malware')
         if not malware_module:
             flash('Malware module not available', 'error')
@@ -209,7 +211,7 @@ def create():
                              basic_deps=BASIC_DEPS_AVAILABLE,
                              sample=sample)
     except Exception as e:
-        logger.error(f"Error in visualization create: {e}\n{traceback.format_exc()}")
+        logger.error("Error in visualization create: %s", e, exc_info=True)
         flash(f"Error: {str(e)}", "error")
         return redirect(url_for('viz.index'))
 
@@ -259,7 +261,6 @@ def view(viz_id):
             return redirect(url_for('viz.index'))
         
         # Get sample data
-        from main import get_module
         malware_module = get_module('malware')
         if not malware_module:
             flash('Malware module not available', 'error')
@@ -290,7 +291,7 @@ def view(viz_id):
                              basic_deps=BASIC_DEPS_AVAILABLE,
                              sample=sample)
     except Exception as e:
-        logger.error(f"Error viewing visualization: {e}\n{traceback.format_exc()}")
+        logger.error("Error viewing visualization: %s", e, exc_info=True)
         flash(f"Error: {str(e)}", "error")
         return redirect(url_for('viz.index'))
 
@@ -768,8 +769,8 @@ def generate_css():
     """
     
     os.makedirs('static/css', exist_ok=True)
-    with open('static/css/viz_module.css', 'w') as f:
-        f.write(css)
+    with open('static/css/viz_module.css', 'wb') as f:
+        f.write(css.encode('utf-8'))
     logger.info("Created visualization CSS file")
 
 def generate_js():
@@ -884,8 +885,8 @@ def generate_js():
     """
     
     os.makedirs('static/js', exist_ok=True)
-    with open('static/js/viz_module.js', 'w') as f:
-        f.write(js)
+    with open('static/js/viz_module.js', 'wb') as f:
+        f.write(js.encode('utf-8'))
     logger.info("Created visualization JS file")
 
 def generate_templates():
@@ -1371,8 +1372,18 @@ def generate_templates():
     }
     
     # Write templates to files if they don't exist
+    # One directory scan instead of a stat() per template
+    with os.scandir('templates') as entries:
+        existing = {entry.name for entry in entries}
     for template_name, content in templates.items():
-        if not os.path.exists(f'templates/{template_name}'):
-            with open(f'templates/{template_name}', 'w') as f:
-                f.write(content)
-            logger.info(f"Created template: {template_name}")
+        if template_name not in existing:
+            # O_EXCL turns a concurrent worker's write into a no-op instead of a rewrite
+            try:
+                fd = os.open(f'templates/{template_name}', os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                continue
+            try:
+                os.write(fd, content.encode('utf-8'))
+            finally:
+                os.close(fd)
+            logger.info("Created template: %s", template_name)
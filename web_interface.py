@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, session, Response, send_file, copy_current_request_context, stream_template
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 import os
 import sqlite3
@@ -11,17 +11,171 @@ import secrets
 import subprocess
 import time
 import threading
+import tempfile
+import gzip
+import mimetypes
+import itertools
+import click
 from functools import wraps
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from werkzeug.security import check_password_hash, generate_password_hash
+from markupsafe import escape
+from jinja2 import FileSystemBytecodeCache, ChoiceLoader, DictLoader, ModuleLoader
 from pathlib import Path
 
+try:
+    from main import get_module, MODULES
+except ImportError:
+    get_module = lambda module_name: None
+    MODULES = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Brotli is optional - gzip companions are always written for static files
+BROTLI_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    logger.warning("brotli not available. Static files will only be precompressed with gzip.")
+
+# POSIX file locking so only one worker writes generated assets
+FCNTL_AVAILABLE = False
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    logger.warning("fcntl not available. Static file generation will not be serialized across workers.")
+
+# Optional C-accelerated minifiers for the generated CSS/JS
+MINIFIERS_AVAILABLE = False
+
+try:
+    import rcssmin
+    import rjsmin
+    MINIFIERS_AVAILABLE = True
+except ImportError:
+    logger.warning("rcssmin/rjsmin not available. Static files will be written unminified.")
+
+# Password hashing - prefer argon2id when argon2-cffi is installed
+ARGON2_AVAILABLE = False
+password_hasher = None
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+    password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+    ARGON2_AVAILABLE = True
+except ImportError:
+    logger.warning("argon2-cffi not available. Falling back to Werkzeug password hashing.")
+
 # Create blueprint - Root path is handled by this blueprint
 web_bp = Blueprint('web', __name__)
 login_manager = LoginManager()
 
+# Web module schema, applied with a single executescript call
+SQL_WEB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+-- Earlier releases added a login index the planner never picked over the username
+-- autoindex; it only duplicated every password hash
+DROP INDEX IF EXISTS idx_users_login;
+CREATE TABLE IF NOT EXISTS infrastructure_status (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    component TEXT NOT NULL,
+    status TEXT NOT NULL,
+    details TEXT,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Dashboard data providers from other modules, see _get_module_capabilities().
+# Providers that did not resolve are looked up again at most every
+# MODULE_CAPABILITY_RETRY_SECONDS, in case their module loads later
+_module_capabilities = {}
+_module_capabilities_checked_at = 0.0
+MODULE_CAPABILITY_RETRY_SECONDS = 30
+_CAPABILITY_PROVIDERS = {
+    'datasets': ('malware', 'get_datasets'),
+    'recent_samples': ('malware', 'get_recent_samples'),
+    'jobs': ('detonation', 'get_detonation_jobs'),
+    'viz': ('viz', 'get_visualizations_for_dashboard'),
+}
+_dashboard_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='dashboard')
+
+# Per-thread SQLite connection reused across requests by _db_connection
+_db_local = threading.local()
+
+# Werkzeug hash prefixes per configured method, see _werkzeug_method_prefix()
+_werkzeug_method_prefixes = {}
+
+# Seconds a connection waits on a locked database before raising "database is locked"
+SQLITE_BUSY_TIMEOUT = 5.0
+
+# Failed login timestamps per client address and username: {(ip, username): deque([ts, ...])}.
+# Keyed on both so one client's failures can't lock everyone out of an account, or
+# out of every account when requests share an address. The state lives in each
+# worker process, so with N gunicorn workers a client gets up to N x LOGIN_MAX_FAILURES
+_login_failures = {}
+_login_failures_lock = threading.Lock()
+LOGIN_MAX_FAILURES = 5
+LOGIN_FAILURE_WINDOW = 60
+LOGIN_TRACKED_KEYS = 10000
+
+# Database paths whose users table is known to exist, see login() and diagnostic()
+_users_table_ready = set()
+
+# User count and admin presence for the diagnostic page: {path: (counted_at, (count, admin))}
+_user_stats_cache = {}
+DIAGNOSTIC_USER_STATS_TTL = 10
+
+# Template directory listings for the diagnostic page: {path: (scanned_at, info)}
+_template_info_cache = {}
+DIAGNOSTIC_TEMPLATE_TTL = 5
+
+# Rendered dashboard pages: {key: (rendered_at, html)}, see _dashboard_cache_key()
+_dashboard_cache = {}
+DASHBOARD_CACHE_TTL = 15
+DASHBOARD_CACHE_MAX_ENTRIES = 256
+
+# Streamed pages go out in blocks of about this many characters; the first block
+# is rendered inside the view, see _stream_page()
+STREAM_BLOCK_SIZE = 8192
+# Closes a streamed page whose template fails after the response has started
+_STREAM_ERROR_FRAGMENT = ('<div class="alert alert-danger m-3">An error occurred while rendering '
+                          'this page. Please reload it or contact your administrator.</div>')
+
+# Badge class per detonation job status; anything else renders as bg-secondary
+JOB_STATUS_BADGE_CLASSES = {
+    'completed': 'bg-success',
+    'failed': 'bg-danger',
+    'running': 'bg-primary',
+}
+
+# Production error pages as encoded bytes: {key: (rendered_at, body)}, see render_error_page()
+_error_page_cache = {}
+ERROR_PAGE_CACHE_TTL = 60
+ERROR_PAGE_CACHE_MAX_ENTRIES = 256
+
+# Day stamp and year used by _current_year()
+_year_cache = {}
+
+# Recently loaded users keyed by id: {user_id: (loaded_at, User or None)}.
+# None records an id with no user row, e.g. a session for a deleted account
+_user_cache = {}
+USER_CACHE_TTL = 60
+USER_CACHE_MAX_SIZE = 10000
+
 class User(UserMixin):
     """User class for Flask-Login"""
     def __init__(self, id, username, role):
@@ -277,6 +431,71 @@ def generate_admin_password(app):
         logger.error(f"Error generating admin password: {e}")
         return f"Secure{secrets.token_hex(8)}!"
 
+def _password_hash_method():
+    """Configured PASSWORD_HASH_METHOD: 'argon2' or any Werkzeug method string.
+    
+    Defaults to argon2 when argon2-cffi is installed and Werkzeug's default otherwise.
+    """
+    try:
+        method = current_app.config.get('PASSWORD_HASH_METHOD')
+    except RuntimeError:
+        method = None
+    if method == 'argon2' and not ARGON2_AVAILABLE:
+        logger.warning("PASSWORD_HASH_METHOD is argon2 but argon2-cffi is not installed")
+        method = None
+    return method or ('argon2' if ARGON2_AVAILABLE else None)
+
+def hash_password(password):
+    """Hash a password with the configured method (argon2id by default)"""
+    method = _password_hash_method()
+    if method == 'argon2':
+        return password_hasher.hash(password)
+    if method:
+        return generate_password_hash(password, method=method)
+    return generate_password_hash(password)
+
+def verify_password(stored_hash, password):
+    """Verify a password against an argon2 or legacy Werkzeug hash.
+    
+    Args:
+        stored_hash (str): Hash stored in the users table
+        password (str): Plain text password to check
+        
+    Returns:
+        tuple: (matches, needs_rehash) - needs_rehash is True when the stored
+        hash should be upgraded to the configured method and parameters
+    """
+    use_argon2 = _password_hash_method() == 'argon2'
+    if stored_hash.startswith('$argon2'):
+        if not ARGON2_AVAILABLE:
+            logger.error("Found argon2 password hash but argon2-cffi is not installed")
+            return False, False
+        try:
+            password_hasher.verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False, False
+        return True, not use_argon2 or password_hasher.check_needs_rehash(stored_hash)
+    
+    # Werkzeug (PBKDF2/scrypt) hash - migrate to argon2, or to a different Werkzeug
+    # method or work factor, on success
+    if not check_password_hash(stored_hash, password):
+        return False, False
+    if use_argon2:
+        return True, True
+    return True, stored_hash.split('$', 1)[0] != _werkzeug_method_prefix(_password_hash_method())
+
+def _werkzeug_method_prefix(method):
+    """Full method string Werkzeug stores for a configured method, e.g. 'scrypt' -> 'scrypt:32768:8:1'
+    
+    Werkzeug fills in its defaults for short method names, so the prefix is taken
+    from a real hash; that costs one hash per method, once per process.
+    """
+    prefix = _werkzeug_method_prefixes.get(method)
+    if prefix is None:
+        sample = generate_password_hash('', method=method) if method else generate_password_hash('')
+        prefix = _werkzeug_method_prefixes[method] = sample.split('$', 1)[0]
+    return prefix
+
 def init_app(app):
     """Initialize web interface module with Flask app"""
     try:
@@ -294,16 +513,43 @@ def init_app(app):
         login_manager.login_message = "Please log in to access this page."
         login_manager.login_message_category = "info"
         
-        # Set up context processor for template variables
+        # Config-derived template variables never change, so they are Jinja
+        # globals; only the year needs the per-render context processor
+        app.extensions['web_template_context'] = build_template_context(app)
+        app.jinja_env.globals.update(app.extensions['web_template_context'])
+        app.jinja_env.globals['job_badge_classes'] = JOB_STATUS_BADGE_CLASSES
         app.context_processor(inject_template_variables)
         
+        # Reuse compiled template bytecode across workers and restarts
+        configure_template_cache(app)
+        
+        # Serve precompressed static files to clients that accept them
+        app.before_request(serve_precompressed_static)
+        
+        # Fingerprinted static URLs can be cached for a long time
+        app.jinja_env.globals['static_v'] = static_v
+        app.after_request(cache_versioned_static)
+        
         # Generate application essentials
         with app.app_context():
             # These operations must be in the correct order
             ensure_directories(app)
             ensure_db_tables(app)
-            generate_base_templates(app)
-            generate_static_files(app)
+            
+            # Images built with 'flask init-assets' ship these files already
+            if app.config.get('GENERATE_TEMPLATES', True):
+                generate_base_templates(app)
+                generate_static_files(app)
+                compile_bundled_templates(app)
+            elif not os.path.exists(os.path.join(app.static_folder, 'css', 'main.css')):
+                logger.error("Static assets are missing and GENERATE_TEMPLATES is off - run 'flask init-assets'")
+            build_static_versions(app)
+            
+            # Serve bundled templates from memory (or precompiled), then the filesystem/blueprint folders.
+            # main calls warm_template_cache once the other modules have written their templates
+            configure_template_loader(app)
+        
+        app.cli.command('init-assets')(init_assets_command)
         
         # Initialize infrastructure manager
         try:
@@ -320,16 +566,130 @@ def init_app(app):
             
         logger.info("Web interface module initialized successfully")
     except Exception as e:
-        logger.error(f"Error in web interface initialization: {e}\n{traceback.format_exc()}")
+        logger.error("Error in web interface initialization: %s", e, exc_info=True)
         # Don't re-raise to allow app to start with limited functionality
 
+def init_assets_command():
+    """Generate templates directory and static files (run once at image build time)"""
+    generate_base_templates(current_app, force=True)
+    generate_static_files(current_app, force=True)
+    compile_bundled_templates(current_app)
+    generate_module_assets()
+    optimize_module_assets(current_app)
+    logger.info("Web assets generated")
+
+def generate_module_assets():
+    """Write the other modules' templates, CSS and JS by calling their generators directly.
+    
+    Their init_app can stop before generating anything at build time (no GCP
+    project, no database), so this does not depend on it. Raises when a module
+    or generator is missing so the image build fails instead of shipping without them.
+    """
+    missing = []
+    for module_name, generators in MODULE_ASSET_GENERATORS:
+        module = get_module(module_name)
+        for generator in generators:
+            func = getattr(module, generator, None) if module else None
+            if func is None:
+                missing.append(f"{module_name}.{generator}")
+                continue
+            func()
+    if missing:
+        raise click.ClickException(f"Module asset generators unavailable: {', '.join(missing)}")
+
+def configure_template_loader(app):
+    """Put the bundled templates in front of the app's regular loader.
+    
+    When a precompiled archive for this release exists, its templates are
+    imported as Python modules and skip lexing and parsing entirely.
+    """
+    loaders = [DictLoader(_TEMPLATE_SOURCES), app.jinja_env.loader]
+    compiled_path = _compiled_templates_path(app)
+    if os.path.exists(compiled_path):
+        loaders.insert(0, ModuleLoader(compiled_path))
+    app.jinja_env.loader = ChoiceLoader(loaders)
+
+def _compiled_templates_path(app):
+    """Location of the precompiled template archive for the current bundled templates"""
+    template_dir = app.template_folder
+    if not os.path.isabs(template_dir):
+        template_dir = os.path.join(app.root_path, template_dir)
+    return os.path.join(template_dir, COMPILED_TEMPLATES_NAME.format(_TEMPLATE_DIGEST))
+
+def compile_bundled_templates(app):
+    """Precompile the bundled templates into a zip archive for ModuleLoader"""
+    target = _compiled_templates_path(app)
+    if os.path.exists(target):
+        return
+    
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        # An overlay keeps the app's autoescape and extension settings
+        env = app.jinja_env.overlay(loader=DictLoader(_TEMPLATE_SOURCES))
+        env.compile_templates(tmp_path, zip='deflated', ignore_errors=False)
+        os.replace(tmp_path, target)
+        logger.info("Precompiled %d bundled templates", len(_TEMPLATE_SOURCES))
+    except Exception as e:
+        logger.error(f"Error precompiling templates: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def configure_template_cache(app):
+    """Set up template compilation: whitespace control, on-disk bytecode cache and no reload checks in production.
+    
+    Must run before any template is loaded, since it replaces the in-memory template cache.
+    """
+    try:
+        cache_dir = app.config.get('JINJA_CACHE_DIR') or os.environ.get(
+            'JINJA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'hc_jinja_bcc'))
+        os.makedirs(cache_dir, exist_ok=True)
+        for option, value in TEMPLATE_WHITESPACE_OPTIONS.items():
+            setattr(app.jinja_env, option, value)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=cache_dir, pattern=BYTECODE_CACHE_PATTERN)
+        
+        if not app.config.get('DEBUG', False):
+            app.config['TEMPLATES_AUTO_RELOAD'] = False
+            app.jinja_env.auto_reload = False
+            # The template set is small and fixed, so a plain dict (Jinja's
+            # cache_size=-1) beats the default 400-entry LRU and its lock
+            app.jinja_env.cache = {}
+        logger.debug("Jinja bytecode cache enabled in %s", cache_dir)
+    except Exception as e:
+        logger.error(f"Error configuring template cache: {e}")
+
+def warm_template_cache(app):
+    """Compile the bundled templates, and any module templates already on disk, up front.
+    
+    With gunicorn --preload this runs in the master, so forked workers share the
+    compiled templates instead of each compiling them on its first request.
+    Module templates load through the bytecode cache, so after the first
+    start this is a cheap unmarshal rather than a full compile.
+    """
+    loader = app.jinja_env.loader
+    loaders = loader.loaders if isinstance(loader, ChoiceLoader) else [loader]
+    names = set(_TEMPLATE_SOURCES)
+    for loader in loaders:
+        try:
+            names.update(name for name in loader.list_templates()
+                         if name.endswith('.html') and not os.path.basename(name).startswith('.'))
+        except TypeError:
+            # ModuleLoader archives can't be listed; they only hold the bundled templates
+            continue
+        except Exception as e:
+            logger.warning("Could not list templates to precompile: %s", e)
+    
+    for name in sorted(names):
+        try:
+            app.jinja_env.get_template(name)
+        except Exception as e:
+            logger.warning(f"Could not precompile template {name}: {e}")
+
 def ensure_directories(app):
     """Ensure all required directories exist"""
+    # Asset subdirectories are created by generate_static_files from the asset paths
     dirs_to_create = [
         app.template_folder,
         app.static_folder,
-        os.path.join(app.static_folder, 'css'),
-        os.path.join(app.static_folder, 'js'),
         os.path.dirname(app.config.get('DATABASE_PATH', '/app/data/malware_platform.db')),
         app.config.get('UPLOAD_FOLDER', '/app/data/uploads')
     ]
@@ -337,77 +697,145 @@ def ensure_directories(app):
     for directory in dirs_to_create:
         try:
             os.makedirs(directory, exist_ok=True)
-            logger.debug(f"Ensured directory exists: {directory}")
+            logger.debug("Ensured directory exists: %s", directory)
         except Exception as e:
             logger.error(f"Error creating directory {directory}: {e}")
 
+def render_error_page(error_code, error_message, error_details=None):
+    """Render error.html, reusing the encoded page for repeated production errors.
+    
+    Without debug details the page depends only on the code, the message and the
+    layout, so an incident producing many identical errors renders it once.
+    """
+    key = None
+    now = time.time()
+    if error_details is None:
+        key = _layout_cache_key()
+        if key is not None:
+            key += (error_code, error_message)
+            cached = _error_page_cache.get(key)
+            if cached is not None and now - cached[0] <= ERROR_PAGE_CACHE_TTL:
+                return cached[1]
+    
+    body = render_template('error.html', 
+                           error_code=error_code,
+                           error_message=error_message,
+                           error_details=error_details).encode('utf-8')
+    if key is not None:
+        if len(_error_page_cache) >= ERROR_PAGE_CACHE_MAX_ENTRIES:
+            _error_page_cache.clear()
+        _error_page_cache[key] = (now, body)
+    return body
+
 def handle_server_error(e):
     """Handle 500 errors gracefully"""
-    error_traceback = traceback.format_exc()
-    logger.error(f"Server error: {str(e)}\n{error_traceback}")
-    debug_mode = current_app.config.get('DEBUG', False)
-    
-    return render_template('error.html', 
-                          error_code=500,
-                          error_message=f"Server error: {str(e)}" if debug_mode else "The server encountered an internal error.",
-                          error_details=error_traceback if debug_mode else None), 500
+    # Let logging format the traceback; only build the string when it is shown
+    logger.error("Server error: %s", e, exc_info=True)
+    if current_app.config.get('DEBUG', False):
+        return render_error_page(500, f"Server error: {str(e)}", traceback.format_exc()), 500
+    return render_error_page(500, "The server encountered an internal error."), 500
 
 def handle_exception(e):
     """Handle uncaught exceptions"""
-    error_traceback = traceback.format_exc()
-    logger.error(f"Uncaught exception: {str(e)}\n{error_traceback}")
-    debug_mode = current_app.config.get('DEBUG', False)
-    
-    return render_template('error.html', 
-                          error_code=500,
-                          error_message=f"Uncaught exception: {str(e)}" if debug_mode else "The server encountered an internal error.",
-                          error_details=error_traceback if debug_mode else None), 500
+    # Let logging format the traceback; only build the string when it is shown
+    logger.error("Uncaught exception: %s", e, exc_info=True)
+    if current_app.config.get('DEBUG', False):
+        return render_error_page(500, f"Uncaught exception: {str(e)}", traceback.format_exc()), 500
+    return render_error_page(500, "The server encountered an internal error."), 500
 
-def inject_template_variables():
-    """Inject common variables into all templates"""
+def build_template_context(app):
+    """Build the config-derived template variables once per app"""
     return {
-        'app_name': current_app.config.get('APP_NAME', 'Malware Detonation Platform'),
-        'year': datetime.datetime.now().year,
+        'app_name': app.config.get('APP_NAME', 'Malware Detonation Platform'),
         'colors': {
-            'primary': current_app.config.get('PRIMARY_COLOR', '#4a6fa5'),
-            'secondary': current_app.config.get('SECONDARY_COLOR', '#6c757d'),
-            'danger': current_app.config.get('DANGER_COLOR', '#dc3545'),
-            'success': current_app.config.get('SUCCESS_COLOR', '#28a745'),
-            'warning': current_app.config.get('WARNING_COLOR', '#ffc107'),
-            'info': current_app.config.get('INFO_COLOR', '#17a2b8'),
-            'dark': current_app.config.get('DARK_COLOR', '#343a40'),
-            'light': current_app.config.get('LIGHT_COLOR', '#f8f9fa')
+            'primary': app.config.get('PRIMARY_COLOR', '#4a6fa5'),
+            'secondary': app.config.get('SECONDARY_COLOR', '#6c757d'),
+            'danger': app.config.get('DANGER_COLOR', '#dc3545'),
+            'success': app.config.get('SUCCESS_COLOR', '#28a745'),
+            'warning': app.config.get('WARNING_COLOR', '#ffc107'),
+            'info': app.config.get('INFO_COLOR', '#17a2b8'),
+            'dark': app.config.get('DARK_COLOR', '#343a40'),
+            'light': app.config.get('LIGHT_COLOR', '#f8f9fa')
         }
     }
 
+def _current_year():
+    """Current year, recomputed at most once per day"""
+    day = int(time.time() // 86400)
+    if _year_cache.get('day') != day:
+        _year_cache['day'] = day
+        _year_cache['year'] = datetime.datetime.now().year
+    return _year_cache['year']
+
+def inject_template_variables():
+    """Inject the per-render template variables; the rest are Jinja globals set in init_app"""
+    return {'year': _current_year()}
+
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user by ID for Flask-Login"""
+    """Load user by ID for Flask-Login, served from a short-lived cache when possible"""
+    cached = _user_cache.get(user_id)
+    if cached and time.time() - cached[0] < USER_CACHE_TTL:
+        return cached[1]
+    
     try:
-        conn = _db_connection()
+        conn = _db_connection(readonly=True)
         cursor = conn.cursor()
         cursor.execute("SELECT id, username, role FROM users WHERE id = ?", (user_id,))
         user = cursor.fetchone()
-        conn.close()
         
-        if user:
-            return User(user[0], user[1], user[2])
+        loaded = User(user['id'], user['username'], user['role']) if user else None
+        if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+            # Dicts keep insertion order, so this drops the oldest entry
+            _user_cache.pop(next(iter(_user_cache)), None)
+        _user_cache[user_id] = (time.time(), loaded)
+        return loaded
     except Exception as e:
-        logger.error(f"Error loading user: {e}")
+        logger.error("Error loading user: %s", e)
     return None
 
-def _db_connection(row_factory=None):
-    """Create a database connection with optional row factory"""
+def invalidate_user_cache(user_id=None):
+    """Drop one cached user (or all of them) after the users table changes"""
+    if user_id is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(str(user_id), None)
+
+def _db_connection(row_factory=sqlite3.Row, readonly=False):
+    """Return this thread's cached database connection with the given row factory.
+    
+    Rows are sqlite3.Row unless the caller asks otherwise. The connection is
+    opened once per worker thread and reused across requests, so callers must
+    not close it. It runs in autocommit mode, so no transaction is left open
+    between requests. Read-only pages pass readonly=True to get a separate
+    mode=ro connection that never takes write locks.
+    """
     try:
         db_path = current_app.config.get('DATABASE_PATH')
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        
-        conn = sqlite3.connect(db_path)
-        if row_factory:
-            conn.row_factory = row_factory
+        slot = 'ro_conn' if readonly else 'conn'
+        conn = getattr(_db_local, slot, None)
+        if conn is None or getattr(_db_local, slot + '_path', None) != db_path:
+            if readonly:
+                conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=SQLITE_BUSY_TIMEOUT,
+                                       check_same_thread=False, isolation_level=None, cached_statements=256)
+                conn.executescript("PRAGMA cache_size=-20000; PRAGMA temp_store=MEMORY;")
+            else:
+                if db_path != ':memory:':
+                    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                conn = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False,
+                                       isolation_level=None, cached_statements=256)
+                # In-memory databases have no journal file to switch to WAL
+                if db_path != ':memory:':
+                    conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(
+                    "PRAGMA synchronous=NORMAL; PRAGMA cache_size=-20000; PRAGMA temp_store=MEMORY;"
+                )
+            setattr(_db_local, slot, conn)
+            setattr(_db_local, slot + '_path', db_path)
+        conn.row_factory = row_factory
         return conn
     except Exception as e:
-        logger.error(f"Database connection error: {e}")
+        logger.error("Database connection error: %s", e)
         raise
 
 def ensure_db_tables(app):
@@ -415,98 +843,205 @@ def ensure_db_tables(app):
     try:
         # Get database path
         db_path = app.config.get('DATABASE_PATH')
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
-        # Connect and check for users table
-        conn = sqlite3.connect(db_path)
+        # Connect and create the schema in one round trip
+        conn = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT)
         cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
-        table_exists = cursor.fetchone() is not None
         
-        # Generate admin password
-        admin_password = generate_admin_password(app)
-        
-        if not table_exists:
-            logger.info("Users table doesn't exist, creating it")
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )''')
-            
-            # Create admin user
-            cursor.execute(
-                "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                ("admin", generate_password_hash(admin_password), "admin")
-            )
-            logger.info(f"Created admin user with password: {admin_password}")
-        else:
-            # Check if admin user exists
-            cursor.execute("SELECT COUNT(*) FROM users WHERE username = 'admin'")
-            if cursor.fetchone()[0] == 0:
-                cursor.execute(
-                    "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                    ("admin", generate_password_hash(admin_password), "admin")
-                )
-                logger.info(f"Created admin user with password: {admin_password}")
+        # WAL is persisted in the database file, so every later connection
+        # (including other modules') gets non-blocking readers
+        if db_path != ':memory:':
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.executescript("PRAGMA synchronous=NORMAL; PRAGMA foreign_keys=ON;")
+        cursor.executescript(SQL_WEB_SCHEMA)
+        _ensure_admin_user(app, cursor)
         
         conn.commit()
         conn.close()
+        _users_table_ready.add(db_path)
     except Exception as e:
-        logger.error(f"Database initialization error: {e}")
-        logger.error(traceback.format_exc())
+        logger.error("Database initialization error: %s", e, exc_info=True)
 
 def create_database_schema(cursor):
     """Create database tables"""
     try:
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )''')
-        
-        # Create default admin user if no users exist
-        cursor.execute("SELECT COUNT(*) FROM users")
-        if cursor.fetchone()[0] == 0:
-            admin_password = generate_admin_password(current_app)
-            
-            cursor.execute(
-                "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                ("admin", generate_password_hash(admin_password), "admin")
-            )
-            logger.info(f"Created admin user with password: {admin_password}")
-        
-        # Create infrastructure status table for tracking
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS infrastructure_status (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            component TEXT NOT NULL,
-            status TEXT NOT NULL,
-            details TEXT,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )''')
-        
+        cursor.executescript(SQL_WEB_SCHEMA)
+        _ensure_admin_user(current_app, cursor)
         logger.info("Web interface database schema created successfully")
     except Exception as e:
         logger.error(f"Error creating web interface database schema: {e}")
         raise
 
+def _ensure_admin_user(app, cursor):
+    """Create the admin account if it is missing; hashing only happens when needed"""
+    cursor.execute("SELECT 1 FROM users WHERE username = 'admin'")
+    if cursor.fetchone() is None:
+        admin_password = generate_admin_password(app)
+        cursor.execute(
+            "INSERT OR IGNORE INTO users (username, password, role) VALUES ('admin', ?, 'admin')",
+            (hash_password(admin_password),)
+        )
+        logger.info(f"Created admin user with password: {admin_password}")
+
+# Index URL per mount point, resolved once instead of on every denied request
+_index_urls = {}
+
 def admin_required(f):
     """Decorator to require admin role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated or current_user.role != 'admin':
             flash('You need admin privileges to access this page', 'danger')
-            return redirect(url_for('web.index'))
+            index_url = _index_urls.get(request.script_root)
+            if index_url is None:
+                index_url = _index_urls[request.script_root] = url_for('web.index')
+            return redirect(index_url)
         return f(*args, **kwargs)
     return decorated_function
 
+# Row link prefixes for the dashboard per mount point: {script_root: {name: prefix}}
+_dashboard_url_prefixes = {}
+
+def _row_url_prefixes():
+    """URL prefixes for the dashboard's per-row links, so the loops concatenate ids instead of calling url_for
+    
+    A prefix is None when its endpoint is missing or its URL does not end in the
+    id; the template then falls back to url_for for that link.
+    """
+    prefixes = _dashboard_url_prefixes.get(request.script_root)
+    if prefixes is None:
+        prefixes = {}
+        for name, endpoint, arg in (('sample_url', 'malware.view', 'sample_id'),
+                                    ('job_url', 'detonation.view', 'job_id')):
+            try:
+                url = url_for(endpoint, **{arg: 0})
+            except Exception:
+                url = ''
+            prefixes[name] = url[:-1] if url.endswith('/0') else None
+        _dashboard_url_prefixes[request.script_root] = prefixes
+    return prefixes
+
+def _get_module_capabilities():
+    """Resolve the dashboard data providers exposed by the other modules.
+    
+    Found providers are kept for the life of the process; web is initialized
+    before the other modules, so the lookup happens on first use rather than
+    in init_app.
+    """
+    global _module_capabilities_checked_at
+    missing = [key for key in _CAPABILITY_PROVIDERS if _module_capabilities.get(key) is None]
+    now = time.time()
+    if missing and now - _module_capabilities_checked_at >= MODULE_CAPABILITY_RETRY_SECONDS:
+        _module_capabilities_checked_at = now
+        modules = {}
+        for key in missing:
+            module_name, attribute = _CAPABILITY_PROVIDERS[key]
+            if module_name not in modules:
+                modules[module_name] = get_module(module_name)
+            _module_capabilities[key] = getattr(modules[module_name], attribute, None)
+    return _module_capabilities
+
+# Records the generated template/static content so startup can skip per-file checks
+ASSET_MANIFEST_NAME = '.manifest.json'
+
+# Static folders already generated by this process
+_GENERATED_STATIC_DIRS = set()
+GENERATION_LOCK_NAME = '.generate.lock'
+
+# Asset generators of the other modules, run by 'flask init-assets'
+MODULE_ASSET_GENERATORS = (
+    ('malware', ('generate_templates', 'generate_css', 'generate_js')),
+    ('detonation', ('generate_templates',)),
+    ('viz', ('generate_templates', 'generate_css', 'generate_js')),
+)
+
+# Precompiled bundled templates, named after their content digest so a stale
+# archive from an older release is never picked up
+COMPILED_TEMPLATES_NAME = '.compiled-{}.zip'
+
+# Whitespace control applied when templates are compiled, so block tags don't
+# leave their indentation and newlines in every rendered page. Neither the
+# bytecode cache nor the archive digest sees environment settings, so the
+# options go into the digest and the bytecode file names change with them
+TEMPLATE_WHITESPACE_OPTIONS = {'trim_blocks': True, 'lstrip_blocks': True}
+BYTECODE_CACHE_PATTERN = '__jinja2_trimmed_%s.cache'
+
+# Content fingerprints for files under /static, filled in at startup, and a
+# digest of the whole set for caches of pages that embed static_v URLs
+_STATIC_VERSIONS = {}
+_static_versions_digest = ''
+
+# Up-to-date compressed companions: {filename: (mimetype, ((encoding, path), ...))}
+_PRECOMPRESSED = {}
+STATIC_VERSIONED_MAX_AGE = 31536000
+
+# Static fallback pages used when template rendering fails
+_INDEX_FALLBACK_HTML = b"""<!DOCTYPE html>
+<html>
+<head>
+    <title>Malware Detonation Platform</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; }
+        h1 { color: #4a6fa5; }
+        .links { margin-top: 20px; }
+        .links a { display: inline-block; margin: 10px; padding: 10px; background-color: #4a6fa5; color: white; text-decoration: none; border-radius: 4px; }
+    </style>
+</head>
+<body>
+    <h1>Malware Detonation Platform</h1>
+    <p>Welcome to the platform.</p>
+    <div class="links">
+        <a href="/malware">Malware Analysis</a>
+        <a href="/detonation">Detonation Service</a>
+        <a href="/viz">Visualizations</a>
+        <a href="/diagnostic">System Diagnostics</a>
+    </div>
+</body>
+</html>
+"""
+
+_LOGIN_FALLBACK_PREFIX = b"""<!DOCTYPE html>
+<html>
+<head>
+    <title>Login - Malware Detonation Platform</title>
+    <style>
+        body { font-family: Arial, sans-serif; text-align: center; margin-top: 50px; }
+        .login-form { max-width: 400px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 5px; }
+        h1 { color: #4a6fa5; }
+        input { width: 100%; padding: 8px; margin-bottom: 10px; }
+        button { padding: 10px 15px; background-color: #4a6fa5; color: white; border: none; cursor: pointer; }
+        .error { color: #dc3545; margin-bottom: 15px; }
+    </style>
+</head>
+<body>
+    <h1>Malware Detonation Platform</h1>
+    <div class="login-form">
+        <h2>Login</h2>
+        """
+
+_LOGIN_FALLBACK_SUFFIX = b"""
+        <form method="POST">
+            <div>
+                <input type="text" id="username" name="username" placeholder="Username" required>
+            </div>
+            <div>
+                <input type="password" id="password" name="password" placeholder="Password" required>
+            </div>
+            <div>
+                <label>
+                    <input type="checkbox" name="remember"> Remember me
+                </label>
+            </div>
+            <button type="submit">Login</button>
+        </form>
+        <p><small>Default username: admin</small></p>
+    </div>
+</body>
+</html>
+"""
+
 # Routes
 @web_bp.route('/')
 def index():
@@ -514,33 +1049,32 @@ def index():
     try:
         return render_template('index.html')
     except Exception as e:
-        logger.error(f"Error rendering index page: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Error rendering index page: %s", e, exc_info=True)
         
         # Fallback to a minimal response if template rendering fails
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Malware Detonation Platform</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                h1 {{ color: #4a6fa5; }}
-                .links {{ margin-top: 20px; }}
-                .links a {{ display: inline-block; margin: 10px; padding: 10px; background-color: #4a6fa5; color: white; text-decoration: none; border-radius: 4px; }}
-            </style>
-        </head>
-        <body>
-            <h1>Malware Detonation Platform</h1>
-            <p>Welcome to the platform.</p>
-            <div class="links">
-                <a href="/malware">Malware Analysis</a>
-                <a href="/detonation">Detonation Service</a>
-                <a href="/viz">Visualizations</a>
-                <a href="/diagnostic">System Diagnostics</a>
-            </div>
-        </body>
-        </html>
-        """
+        return Response(_INDEX_FALLBACK_HTML, mimetype='text/html')
+
+def _login_rate_limited(key):
+    """Check whether an (address, username) pair has used up its failed-login budget for the window"""
+    cutoff = time.time() - LOGIN_FAILURE_WINDOW
+    with _login_failures_lock:
+        attempts = _login_failures.get(key)
+        if not attempts:
+            return False
+        while attempts and attempts[0] < cutoff:
+            attempts.popleft()
+        if not attempts:
+            del _login_failures[key]
+            return False
+        return len(attempts) >= LOGIN_MAX_FAILURES
+
+def _record_login_failure(key):
+    """Remember a failed login for the per-(address, username) sliding window"""
+    with _login_failures_lock:
+        if key not in _login_failures and len(_login_failures) >= LOGIN_TRACKED_KEYS:
+            # Dicts keep insertion order, so this forgets the oldest entry
+            _login_failures.pop(next(iter(_login_failures)))
+        _login_failures.setdefault(key, deque()).append(time.time())
 
 @web_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -556,36 +1090,56 @@ def login():
             password = request.form.get('password')
             remember = 'remember' in request.form
             
-            # Ensure database exists
-            db_path = current_app.config.get('DATABASE_PATH')
-            os.makedirs(os.path.dirname(db_path), exist_ok=True)
-                
-            if not os.path.exists(db_path):
-                ensure_db_tables(current_app)
+            # remote_addr is the client's address once main's ProxyFix has applied X-Forwarded-For
+            throttle_key = (request.remote_addr, username)
             
-            conn = _db_connection()
-            cursor = conn.cursor()
-            
-            # Check if users table exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
-            if cursor.fetchone() is None:
-                create_database_schema(cursor)
-                conn.commit()
-            
-            cursor.execute("SELECT id, username, password, role FROM users WHERE username = ?", (username,))
-            user_data = cursor.fetchone()
-            conn.close()
-            
-            if user_data and check_password_hash(user_data[2], password):
-                user = User(user_data[0], user_data[1], user_data[3])
-                login_user(user, remember=remember)
+            # Reject empty and rate-limited attempts before touching SQLite or the hasher
+            if not username or not password:
+                error = 'Invalid username or password'
+            elif _login_rate_limited(throttle_key):
+                error = 'Too many failed login attempts. Please try again in a minute.'
+            else:
+                # Ensure database and users table exist - checked once per process
+                db_path = current_app.config.get('DATABASE_PATH')
+                if db_path not in _users_table_ready:
+                    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                    if not os.path.exists(db_path):
+                        ensure_db_tables(current_app)
+                
+                conn = _db_connection()
+                cursor = conn.cursor()
+                
+                if db_path not in _users_table_ready:
+                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
+                    if cursor.fetchone() is None:
+                        create_database_schema(cursor)
+                        conn.commit()
+                    _users_table_ready.add(db_path)
+                
+                # Served by the UNIQUE autoindex on username plus one rowid lookup
+                cursor.execute(
+                    "SELECT id, username, password, role FROM users WHERE username = ?",
+                    (username,)
+                )
+                user_data = cursor.fetchone()
+                
+                password_ok, needs_rehash = verify_password(user_data['password'], password) if user_data else (False, False)
+                if password_ok and needs_rehash:
+                    # Lazily migrate legacy hashes on successful login
+                    cursor.execute("UPDATE users SET password = ? WHERE id = ?", (hash_password(password), user_data['id']))
+                    conn.commit()
                 
-                next_page = request.args.get('next')
-                if not next_page or not next_page.startswith('/'):
-                    next_page = url_for('web.dashboard')
-                return redirect(next_page)
+                if password_ok:
+                    user = User(user_data['id'], user_data['username'], user_data['role'])
+                    login_user(user, remember=remember)
                 
-            error = 'Invalid username or password'
+                    next_page = request.args.get('next')
+                    if not next_page or not next_page.startswith('/'):
+                        next_page = url_for('web.dashboard')
+                    return redirect(next_page)
+                
+                error = 'Invalid username or password'
+                _record_login_failure(throttle_key)
         except Exception as e:
             logger.error(f"Login error: {e}")
             error = 'An error occurred during login. Please try again.'
@@ -595,44 +1149,8 @@ def login():
     except Exception as e:
         logger.error(f"Error rendering login template: {e}")
         # Fallback to a basic login form
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Login - Malware Detonation Platform</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; text-align: center; margin-top: 50px; }}
-                .login-form {{ max-width: 400px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 5px; }}
-                h1 {{ color: #4a6fa5; }}
-                input {{ width: 100%; padding: 8px; margin-bottom: 10px; }}
-                button {{ padding: 10px 15px; background-color: #4a6fa5; color: white; border: none; cursor: pointer; }}
-                .error {{ color: #dc3545; margin-bottom: 15px; }}
-            </style>
-        </head>
-        <body>
-            <h1>Malware Detonation Platform</h1>
-            <div class="login-form">
-                <h2>Login</h2>
-                {{'<div class="error">' + error + '</div>' if error else ''}}
-                <form method="POST">
-                    <div>
-                        <input type="text" id="username" name="username" placeholder="Username" required>
-                    </div>
-                    <div>
-                        <input type="password" id="password" name="password" placeholder="Password" required>
-                    </div>
-                    <div>
-                        <label>
-                            <input type="checkbox" name="remember"> Remember me
-                        </label>
-                    </div>
-                    <button type="submit">Login</button>
-                </form>
-                <p><small>Default username: admin</small></p>
-            </div>
-        </body>
-        </html>
-        """
+        error_html = b'<div class="error">' + str(escape(error)).encode() + b'</div>' if error else b''
+        return Response(_LOGIN_FALLBACK_PREFIX + error_html + _LOGIN_FALLBACK_SUFFIX, mimetype='text/html')
 
 @web_bp.route('/logout')
 @login_required
@@ -652,37 +1170,135 @@ def dashboard():
     visualizations = []
     
     try:
-        from main import get_module
+        capabilities = _get_module_capabilities()
+        loaders = {}
         
         # Try to get malware samples
-        malware_module = get_module('malware')
-        if malware_module:
-            if hasattr(malware_module, 'get_datasets'):
-                datasets = malware_module.get_datasets()
-            elif hasattr(malware_module, 'get_recent_samples'):
-                datasets = malware_module.get_recent_samples(5)
+        if capabilities['datasets']:
+            loaders['datasets'] = capabilities['datasets']
+        elif capabilities['recent_samples']:
+            loaders['datasets'] = lambda: capabilities['recent_samples'](5)
         
-        # Try to get detonation jobs
-        detonation_module = get_module('detonation')
-        if detonation_module and hasattr(detonation_module, 'get_detonation_jobs'):
-            analyses = detonation_module.get_detonation_jobs()[:5] if hasattr(detonation_module.get_detonation_jobs(), '__len__') else []
+        # Try to get detonation jobs - only the rows the dashboard shows
+        if capabilities['jobs']:
+            loaders['analyses'] = lambda: capabilities['jobs'](limit=5) or []
         
         # Try to get visualizations
-        viz_module = get_module('viz')
-        if viz_module and hasattr(viz_module, 'get_visualizations_for_dashboard'):
-            visualizations = viz_module.get_visualizations_for_dashboard()
+        if capabilities['viz']:
+            loaders['visualizations'] = capabilities['viz']
+        
+        # The providers are independent I/O, so run them concurrently
+        futures = {key: _dashboard_executor.submit(copy_current_request_context(loader))
+                   for key, loader in loaders.items()}
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                logger.error(f"Dashboard {key} loading error: {e}")
+        datasets = results.get('datasets', datasets)
+        analyses = results.get('analyses', analyses)
+        visualizations = results.get('visualizations', visualizations)
     except Exception as e:
         logger.error(f"Dashboard data loading error: {e}")
     
     try:
-        return render_template('dashboard.html', 
+        key = _dashboard_cache_key(datasets, analyses, visualizations)
+        now = time.time()
+        cached = _dashboard_cache.get(key) if key is not None else None
+        if cached is not None and now - cached[0] <= DASHBOARD_CACHE_TTL:
+            return cached[1]
+        
+        html = render_template('dashboard.html', 
                             datasets=datasets, 
                             analyses=analyses,
-                            visualizations=visualizations)
+                            visualizations=visualizations,
+                            **_row_url_prefixes())
+        if key is not None:
+            if len(_dashboard_cache) >= DASHBOARD_CACHE_MAX_ENTRIES:
+                _dashboard_cache.clear()
+            _dashboard_cache[key] = (now, html)
+        return html
     except Exception as e:
         logger.error(f"Error rendering dashboard template: {e}")
         return redirect(url_for('web.index'))
 
+def _item_field(item, name):
+    """Read a field from a provider row, which may be a dict, sqlite3.Row or object"""
+    try:
+        return item[name]
+    except (KeyError, IndexError, TypeError):
+        return getattr(item, name, None)
+
+def _layout_cache_key():
+    """What base.html renders for the current request, or None when its output must not be reused"""
+    # Pending flash messages are consumed by the render and must not be replayed
+    if session.get('_flashes'):
+        return None
+    # The static digest keeps pages from outliving the static_v URLs they embed
+    if not current_user.is_authenticated:
+        return (request.script_root, _static_versions_digest, None, None, None, _current_year())
+    return (request.script_root, _static_versions_digest, current_user.id, current_user.username,
+            current_user.role, _current_year())
+
+def _dashboard_cache_key(datasets, analyses, visualizations):
+    """Cheap summary of what dashboard.html renders, or None when the page must not be cached
+    
+    Providers return only a handful of recent rows, so ids (and job status, the
+    only field that changes in place) identify the page; DASHBOARD_CACHE_TTL
+    bounds how long other edits to those rows can go unseen.
+    """
+    layout_key = _layout_cache_key()
+    if layout_key is None:
+        return None
+    try:
+        return layout_key + (
+                tuple(_item_field(d, 'id') for d in datasets),
+                tuple((_item_field(a, 'id'), _item_field(a, 'status')) for a in analyses),
+                tuple(_item_field(v, 'id') for v in visualizations))
+    except TypeError:
+        # Unhashable ids or non-iterable provider results
+        return None
+
+def _stream_blocks(chunks):
+    """Join Jinja's many small output strings into blocks of STREAM_BLOCK_SIZE"""
+    buffer, size = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_BLOCK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+def _stream_page(template_name, **context):
+    """Send a page as it renders, in blocks.
+    
+    The first block is rendered before returning, so a missing template or a
+    failure in the layout still raises inside the view and reaches its fallback.
+    Later errors can no longer change the status, so they are logged and the
+    page ends with an error notice rather than being cut off silently.
+    
+    While flashed messages are pending the page is rendered whole: the session
+    cookie is written before a streamed body, so consumed flashes would replay.
+    """
+    if session.get('_flashes'):
+        return render_template(template_name, **context)
+    
+    blocks = _stream_blocks(stream_template(template_name, **context))
+    first = next(blocks, '')
+    
+    def generate():
+        yield first
+        try:
+            yield from blocks
+        except Exception:
+            logger.error("Error streaming template %s", template_name, exc_info=True)
+            yield _STREAM_ERROR_FRAGMENT
+    
+    return Response(generate(), mimetype='text/html')
+
 @web_bp.route('/profile')
 @login_required
 def profile():
@@ -699,66 +1315,75 @@ def profile():
 def users():
     """User management page - admin only"""
     try:
-        conn = _db_connection(sqlite3.Row)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, username, role, created_at FROM users ORDER BY id")
-        users_list = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        conn = _db_connection(readonly=True)
+        # sqlite3.Row supports lookup by column name, so Jinja can use the rows directly.
+        # Rows are read from the cursor as the page streams instead of fetched up front;
+        # the first one is read here so '{% if users %}' sees an empty table correctly
+        cursor = conn.execute("SELECT id, username, role, created_at FROM users ORDER BY id")
+        first_row = cursor.fetchone()
+        users_list = itertools.chain((first_row,), cursor) if first_row is not None else []
     except Exception as e:
         logger.error(f"Error fetching users: {e}")
         users_list = []
         flash("Error loading users", "danger")
     
     try:
-        return render_template('users.html', users=users_list)
+        return _stream_page('users.html', users=users_list)
     except Exception as e:
         logger.error(f"Error rendering users template: {e}")
         return redirect(url_for('web.dashboard'))
 
+def _diagnostic_app_info(app):
+    """App settings shown on the diagnostic page; they do not change after startup"""
+    info = app.extensions.get('web_diagnostic_app_info')
+    if info is None:
+        info = app.extensions['web_diagnostic_app_info'] = {
+            'app_name': app.config.get('APP_NAME', 'Malware Detonation Platform'),
+            'debug_mode': app.config.get('DEBUG', False),
+            'templates_path': app.template_folder,
+            'static_path': app.static_folder,
+        }
+    return info
+
+def _diagnostic_template_info(template_dir):
+    """Template directory listing, rescanned at most every DIAGNOSTIC_TEMPLATE_TTL seconds"""
+    cached = _template_info_cache.get(template_dir)
+    if cached and time.time() - cached[0] < DIAGNOSTIC_TEMPLATE_TTL:
+        return cached[1]
+    
+    template_info = {'path': template_dir}
+    try:
+        template_info['exists'] = os.path.exists(template_dir)
+        if template_info['exists']:
+            templates = os.listdir(template_dir)
+            template_info['files'] = templates
+            template_info['base_exists'] = 'base.html' in templates
+            template_info['index_exists'] = 'index.html' in templates
+    except Exception as e:
+        template_info['error'] = str(e)
+    
+    _template_info_cache[template_dir] = (time.time(), template_info)
+    return template_info
+
 @web_bp.route('/diagnostic')
 def diagnostic():
     """Diagnostic page with system information"""
     diagnostics = {
-        'app_info': {
-            'app_name': current_app.config.get('APP_NAME', 'Malware Detonation Platform'),
-            'debug_mode': current_app.config.get('DEBUG', False),
-            'templates_path': current_app.template_folder,
-            'static_path': current_app.static_folder,
-        },
+        'app_info': _diagnostic_app_info(current_app),
         'module_status': {},
-        'template_info': {},
+        'template_info': _diagnostic_template_info(current_app.template_folder),
         'database_info': {},
         'route_info': {}
     }
     
     # Check module status
-    try:
-        from main import module_status
-        diagnostics['module_status'] = module_status
-    except ImportError:
-        # Try using MODULES directly from main
-        try:
-            from main import MODULES
-            diagnostics['module_status'] = {name: {
-                "initialized": info.get("initialized", False),
-                "error": info.get("error", None)
-            } for name, info in MODULES.items()}
-        except ImportError:
-            diagnostics['module_status'] = {'error': 'Could not import module status from main'}
-    
-    # Check template files
-    try:
-        template_dir = current_app.template_folder
-        diagnostics['template_info']['path'] = template_dir
-        diagnostics['template_info']['exists'] = os.path.exists(template_dir)
-        
-        if diagnostics['template_info']['exists']:
-            templates = os.listdir(template_dir)
-            diagnostics['template_info']['files'] = templates
-            diagnostics['template_info']['base_exists'] = 'base.html' in templates
-            diagnostics['template_info']['index_exists'] = 'index.html' in templates
-    except Exception as e:
-        diagnostics['template_info']['error'] = str(e)
+    if MODULES is not None:
+        diagnostics['module_status'] = {name: {
+            "initialized": info.get("initialized", False),
+            "error": info.get("error", None)
+        } for name, info in MODULES.items()}
+    else:
+        diagnostics['module_status'] = {'error': 'Could not import module status from main'}
     
     # Check database
     try:
@@ -767,71 +1392,45 @@ def diagnostic():
         diagnostics['database_info']['exists'] = os.path.exists(db_path)
         
         if diagnostics['database_info']['exists']:
-            conn = _db_connection()
-            cursor = conn.cursor()
+            conn = _db_connection(readonly=True)
             
-            # Check users table
-            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='users'")
-            diagnostics['database_info']['users_table_exists'] = cursor.fetchone()[0] > 0
+            # The schema doesn't change at runtime, so the table check is done once
+            if db_path not in _users_table_ready:
+                row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='users'").fetchone()
+                if row is not None:
+                    _users_table_ready.add(db_path)
+            diagnostics['database_info']['users_table_exists'] = db_path in _users_table_ready
             
-            # Check user count
+            # Check user count and admin user in one statement, cached briefly
             if diagnostics['database_info']['users_table_exists']:
-                cursor.execute("SELECT COUNT(*) FROM users")
-                diagnostics['database_info']['user_count'] = cursor.fetchone()[0]
-                
-                # Check admin user
-                cursor.execute("SELECT COUNT(*) FROM users WHERE username='admin'")
-                diagnostics['database_info']['admin_user_exists'] = cursor.fetchone()[0] > 0
-            
-            conn.close()
+                cached = _user_stats_cache.get(db_path)
+                if cached is None or time.time() - cached[0] > DIAGNOSTIC_USER_STATS_TTL:
+                    stats = conn.execute(
+                        "SELECT COUNT(1), EXISTS(SELECT 1 FROM users WHERE username='admin') FROM users"
+                    ).fetchone()
+                    cached = (time.time(), tuple(stats))
+                    _user_stats_cache[db_path] = cached
+                user_count, admin_exists = cached[1]
+                diagnostics['database_info']['user_count'] = user_count
+                diagnostics['database_info']['admin_user_exists'] = bool(admin_exists)
     except Exception as e:
         diagnostics['database_info']['error'] = str(e)
     
     try:
-        return render_template('diagnostic.html', diagnostics=diagnostics)
+        return _stream_page('diagnostic.html', diagnostics=diagnostics)
     except Exception as e:
         logger.error(f"Error rendering diagnostic template: {e}")
         # Return JSON response if template fails
         return jsonify(diagnostics)
 
-@web_bp.route('/health')
-def health_check():
-    """Health check endpoint"""
-    health_data = {"status": "healthy", "source": "web_blueprint"}
-    
-    # Check database health
-    try:
-        conn = _db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM users")
-        health_data["database"] = {"status": "healthy", "user_count": cursor.fetchone()[0]}
-        conn.close()
-    except Exception as e:
-        health_data["database"] = {"status": "unhealthy", "error": str(e)}
-        health_data["status"] = "degraded"
-    
-    # Check template directory
-    try:
-        template_dir = current_app.template_folder
-        health_data["templates"] = {
-            "status": "healthy" if os.path.exists(template_dir) else "unhealthy",
-            "path": template_dir
-        }
-        if not os.path.exists(template_dir):
-            health_data["status"] = "degraded"
-    except Exception as e:
-        health_data["templates"] = {"status": "unhealthy", "error": str(e)}
-        health_data["status"] = "degraded"
-    
-    health_data["timestamp"] = datetime.datetime.now().isoformat()
-    return jsonify(health_data)
-
 @web_bp.route('/recreate-templates', methods=['POST'])
 def recreate_templates():
     """Recreate basic templates endpoint"""
     try:
-        generate_base_templates(current_app)
-        generate_static_files(current_app)
+        generate_base_templates(current_app, force=True)
+        generate_static_files(current_app, force=True)
+        build_static_versions(current_app)
+        _template_info_cache.clear()
         return jsonify({"success": True, "message": "Templates recreated successfully"})
     except Exception as e:
         logger.error(f"Error recreating templates: {e}")
@@ -866,10 +1465,10 @@ def infrastructure():
             outputs = {}
             status = {"initialized": False, "error": "Infrastructure manager not initialized"}
             
-        return render_template('infrastructure.html', 
-                              tf_installed=tf_installed,
-                              status=status,
-                              outputs=outputs)
+        return _stream_page('infrastructure.html', 
+                            tf_installed=tf_installed,
+                            status=status,
+                            outputs=outputs)
     except Exception as e:
         logger.error(f"Error in infrastructure page: {e}")
         flash(f"Error loading infrastructure management: {str(e)}", "error")
@@ -968,7 +1567,10 @@ def infrastructure_status():
             "outputs": outputs
         }
         
-        return jsonify(status_data)
+        # Let the polling page revalidate instead of re-downloading unchanged status
+        response = jsonify(status_data)
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         logger.error(f"Error getting infrastructure status: {e}")
         return jsonify({"error": str(e)}), 500
@@ -984,21 +1586,19 @@ def add_user():
         role = request.form.get('role', 'user')
         
         try:
-            # Check if username already exists
             conn = _db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM users WHERE username = ?", (username,))
-            if cursor.fetchone()[0] > 0:
+            # Create new user - the UNIQUE constraint turns a duplicate into a no-op,
+            # so one statement both checks and inserts
+            cursor = conn.execute(
+                "INSERT INTO users (username, password, role) VALUES (?, ?, ?) "
+                "ON CONFLICT(username) DO NOTHING",
+                (username, hash_password(password), role)
+            )
+            if cursor.rowcount == 0:
                 flash(f"User '{username}' already exists", "danger")
                 return redirect(url_for('web.add_user'))
-                
-            # Create new user
-            cursor.execute(
-                "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                (username, generate_password_hash(password), role)
-            )
-            conn.commit()
-            conn.close()
+            invalidate_user_cache()
+            _user_stats_cache.clear()
             
             flash(f"User '{username}' created successfully", "success")
             return redirect(url_for('web.users'))
@@ -1011,20 +1611,9 @@ def add_user():
     roles = ['user', 'admin', 'analyst']
     return render_template('add_user.html', roles=roles)
 
-def generate_static_files(app):
-    """Generate CSS and JS files if they don't exist"""
-    try:
-        # Create directories
-        css_dir = os.path.join(app.static_folder, 'css')
-        js_dir = os.path.join(app.static_folder, 'js')
-        os.makedirs(css_dir, exist_ok=True)
-        os.makedirs(js_dir, exist_ok=True)
-        
-        # CSS file
-        css_path = os.path.join(css_dir, 'main.css')
-        if not os.path.exists(css_path):
-            with open(css_path, 'w') as f:
-                f.write("""/* Main CSS styles */
+# Generated static assets as pre-encoded (path, content) pairs
+_STATIC_FILES = (
+    ('css/main.css', b"""/* Main CSS styles */
 body { font-family: 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; color: #333; background-color: #f8f9fa; }
 .card { box-shadow: 0 2px 4px rgba(0,0,0,0.05); margin-bottom: 20px; border: none; border-radius: 8px; }
 .card-header { border-top-left-radius: 8px !important; border-top-right-radius: 8px !important; }
@@ -1032,68 +1621,90 @@ body { font-family: 'Helvetica Neue', Arial, sans-serif; line-height: 1.6; color
 .table-responsive { overflow-x: auto; }
 footer { margin-top: 50px; padding: 20px 0; border-top: 1px solid #e9ecef; }
 pre { background-color: #f8f9fa; padding: 10px; border-radius: 4px; border: 1px solid #dee2e6; white-space: pre-wrap; max-height: 300px; overflow-y: auto; }
-""")
-                logger.info("Created main CSS file")
-        
-        # JS file
-        js_path = os.path.join(js_dir, 'main.js')
-        if not os.path.exists(js_path):
-            with open(js_path, 'w') as f:
-                f.write("""// Main JavaScript
+.alert:not(.alert-permanent) { animation: hc-fade 0.5s 5s forwards; }
+@keyframes hc-fade { to { opacity: 0; visibility: hidden; } }
+"""),
+    ('js/main.js', b"""// Main JavaScript
+// Handle delete confirmations with one delegated listener
+document.addEventListener('click', function(e) {
+    const target = e.target.closest('[data-confirm]');
+    if (target && !confirm(target.getAttribute('data-confirm') || 'Are you sure?')) {
+        e.preventDefault();
+    }
+}, true);
+
+// Alerts fade out via the hc-fade CSS animation; drop them once it finishes
+document.addEventListener('animationend', function(e) {
+    if (e.animationName === 'hc-fade') {
+        e.target.remove();
+    }
+});
+"""),
+    ('js/diagnostic.js', b"""// Diagnostic page actions
 document.addEventListener('DOMContentLoaded', function() {
-    // Handle delete confirmations
-    const confirmButtons = document.querySelectorAll('[data-confirm]');
-    if (confirmButtons) {
-        confirmButtons.forEach(button => {
-            button.addEventListener('click', function(e) {
-                if (!confirm(this.getAttribute('data-confirm') || 'Are you sure?')) {
-                    e.preventDefault();
-                }
-            });
+    // Recreate templates button
+    const recreateBtn = document.getElementById('recreate-templates-btn');
+    if (recreateBtn) {
+        recreateBtn.addEventListener('click', function() {
+            if (confirm('Are you sure you want to recreate all templates? This may overwrite existing templates.')) {
+                fetch('/recreate-templates', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'}
+                })
+                .then(response => response.json())
+                .then(data => {
+                    alert(data.message);
+                    location.reload();
+                })
+                .catch(error => {
+                    console.error('Error:', error);
+                    alert('An error occurred while recreating templates.');
+                });
+            }
         });
     }
     
-    // Auto-hide alerts after 5 seconds
-    const alerts = document.querySelectorAll('.alert:not(.alert-permanent)');
-    if (alerts) {
-        alerts.forEach(alert => {
-            setTimeout(function() {
-                alert.classList.add('fade');
-                setTimeout(function() { alert.remove(); }, 500);
-            }, 5000);
+    // Initialize database button
+    const initDbBtn = document.getElementById('init-database-btn');
+    if (initDbBtn) {
+        initDbBtn.addEventListener('click', function() {
+            if (confirm('Are you sure you want to initialize the database? This may overwrite existing data.')) {
+                fetch('/init-database', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'}
+                })
+                .then(response => response.json())
+                .then(data => {
+                    alert(data.message);
+                    location.reload();
+                })
+                .catch(error => {
+                    console.error('Error:', error);
+                    alert('An error occurred while initializing the database.');
+                });
+            }
         });
     }
 });
-""")
-                logger.info("Created main JS file")
-    except Exception as e:
-        logger.error(f"Error generating static files: {e}")
+"""),
+)
 
-def generate_base_templates(app=None):
-    """Generate essential HTML templates for the application"""
-    try:
-        # Use current_app if app is not provided
-        if app is None:
-            app = current_app
-            
-        # Create templates directory
-        template_dir = app.template_folder
-        if not os.path.isabs(template_dir):
-            template_dir = os.path.join(app.root_path, template_dir)
-            
-        os.makedirs(template_dir, exist_ok=True)
-        
-        # Define templates with infrastructure template included
-        templates = {
-            'base.html': """<!DOCTYPE html>
+# Generated base templates as pre-encoded (name, content) pairs
+_TEMPLATES = (
+    ('base.html', b"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{% block title %}{{ app_name }}{% endblock %}</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
-    <link href="{{ url_for('static', filename='css/main.css') }}" rel="stylesheet">
+    <link rel="preconnect" href="https://cdn.jsdelivr.net" crossorigin>
+    <link rel="preconnect" href="https://cdnjs.cloudflare.com" crossorigin>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-1BmE4kWBq78iYhFldvKuhfTAU6auU8tT94WrHftjDbrCEXSU1oBoqyl2qvZ6jIW3" crossorigin="anonymous">
+    <link rel="preload" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" as="style" crossorigin="anonymous" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript><link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" crossorigin="anonymous"></noscript>
+    <style>{% raw %}<!--CRITICAL_CSS-->{% endraw %}</style>
+    <link rel="preload" href="{{ static_v('css/main.css') }}" as="style" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript><link href="{{ static_v('css/main.css') }}" rel="stylesheet"></noscript>
     {% block head %}{% endblock %}
     <style>
         .navbar { background-color: {{ colors.primary }} !important; }
@@ -1160,13 +1771,12 @@ def generate_base_templates(app=None):
         </div>
     </footer>
 
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-    <script src="{{ url_for('static', filename='js/main.js') }}"></script>
+    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js" integrity="sha384-ka7Sk0Gln4gmtz2MlQnikT1wXgYsOg+OMhuP+IlRH9sENBO0LRn5q+8nbTov4+1p" crossorigin="anonymous" defer></script>
+    <script src="{{ static_v('js/main.js') }}" defer></script>
     {% block scripts %}{% endblock %}
 </body>
-</html>""",
-            
-            'index.html': """{% extends 'base.html' %}
+</html>"""),
+    ('index.html', b"""{% extends 'base.html' %}
 {% block title %}{{ app_name }}{% endblock %}
 {% block content %}
 <div class="jumbotron bg-light p-5 rounded">
@@ -1228,9 +1838,8 @@ def generate_base_templates(app=None):
         </div>
     </div>
 </div>
-{% endblock %}""",
-            
-            'login.html': """{% extends 'base.html' %}
+{% endblock %}"""),
+    ('login.html', b"""{% extends 'base.html' %}
 {% block title %}Login - {{ app_name }}{% endblock %}
 {% block content %}
 <div class="row justify-content-center">
@@ -1267,9 +1876,8 @@ def generate_base_templates(app=None):
         </div>
     </div>
 </div>
-{% endblock %}""",
-            
-            'error.html': """{% extends 'base.html' %}
+{% endblock %}"""),
+    ('error.html', b"""{% extends 'base.html' %}
 {% block title %}Error {{ error_code }} - {{ app_name }}{% endblock %}
 {% block content %}
 <div class="row justify-content-center mt-5">
@@ -1295,9 +1903,8 @@ def generate_base_templates(app=None):
         </div>
     </div>
 </div>
-{% endblock %}""",
-
-            'dashboard.html': """{% extends 'base.html' %}
+{% endblock %}"""),
+    ('dashboard.html', b"""{% extends 'base.html' %}
 {% block title %}Dashboard - {{ app_name }}{% endblock %}
 {% block content %}
 <div class="d-flex justify-content-between align-items-center mb-4">
@@ -1391,13 +1998,13 @@ def generate_base_templates(app=None):
                 {% if datasets %}
                     <div class="list-group">
                         {% for sample in datasets %}
-                            <a href="{{ url_for('malware.view', sample_id=sample.id) }}" class="list-group-item list-group-item-action">
+                            <a href="{% if sample_url %}{{ sample_url }}{{ sample.id }}{% else %}{{ url_for('malware.view', sample_id=sample.id) }}{% endif %}" class="list-group-item list-group-item-action">
                                 <div class="d-flex w-100 justify-content-between">
                                     <h6 class="mb-1">{{ sample.name }}</h6>
                                     <small>{{ sample.created_at|default('Unknown date', true) }}</small>
                                 </div>
                                 <p class="mb-1">Type: {{ sample.file_type }}</p>
-                                <small class="text-muted">SHA256: {{ sample.sha256[:10] }}...</small>
+                                <small class="text-muted">SHA256: {{ sample.short_sha or sample.sha256[:10] }}...</small>
                             </a>
                         {% endfor %}
                     </div>
@@ -1421,10 +2028,10 @@ def generate_base_templates(app=None):
                 {% if analyses %}
                     <div class="list-group">
                         {% for job in analyses %}
-                            <a href="{{ url_for('detonation.view', job_id=job.id) }}" class="list-group-item list-group-item-action">
+                            <a href="{% if job_url %}{{ job_url }}{{ job.id }}{% else %}{{ url_for('detonation.view', job_id=job.id) }}{% endif %}" class="list-group-item list-group-item-action">
                                 <div class="d-flex w-100 justify-content-between">
                                     <h6 class="mb-1">Job #{{ job.id }}</h6>
-                                    <span class="badge {% if job.status == 'completed' %}bg-success{% elif job.status == 'failed' %}bg-danger{% elif job.status == 'running' %}bg-primary{% else %}bg-secondary{% endif %}">
+                                    <span class="badge {{ job_badge_classes.get(job.status, 'bg-secondary') }}">
                                         {{ job.status }}
                                     </span>
                                 </div>
@@ -1443,9 +2050,8 @@ def generate_base_templates(app=None):
         </div>
     </div>
 </div>
-{% endblock %}""",
-
-            'profile.html': """{% extends 'base.html' %}
+{% endblock %}"""),
+    ('profile.html', b"""{% extends 'base.html' %}
 {% block title %}User Profile - {{ app_name }}{% endblock %}
 {% block content %}
 <div class="row">
@@ -1483,9 +2089,8 @@ def generate_base_templates(app=None):
         </div>
     </div>
 </div>
-{% endblock %}""",
-
-            'users.html': """{% extends 'base.html' %}
+{% endblock %}"""),
+    ('users.html', b"""{% extends 'base.html' %}
 {% block title %}User Management - {{ app_name }}{% endblock %}
 {% block content %}
 <div class="d-flex justify-content-between align-items-center mb-4">
@@ -1541,9 +2146,8 @@ def generate_base_templates(app=None):
         <i class="fas fa-exclamation-triangle"></i> No users found.
     </div>
 {% endif %}
-{% endblock %}""",
-
-            'add_user.html': """{% extends 'base.html' %}
+{% endblock %}"""),
+    ('add_user.html', b"""{% extends 'base.html' %}
 {% block title %}Add User - {{ app_name }}{% endblock %}
 {% block content %}
 <div class="row">
@@ -1585,9 +2189,8 @@ def generate_base_templates(app=None):
         </div>
     </div>
 </div>
-{% endblock %}""",
-
-            'diagnostic.html': """{% extends 'base.html' %}
+{% endblock %}"""),
+    ('diagnostic.html', b"""{% extends 'base.html' %}
 {% block title %}System Diagnostics - {{ app_name }}{% endblock %}
 {% block content %}
 <div class="d-flex justify-content-between align-items-center mb-4">
@@ -1767,56 +2370,9 @@ def generate_base_templates(app=None):
 {% endblock %}
 
 {% block scripts %}
-<script>
-    document.addEventListener('DOMContentLoaded', function() {
-        // Recreate templates button
-        const recreateBtn = document.getElementById('recreate-templates-btn');
-        if (recreateBtn) {
-            recreateBtn.addEventListener('click', function() {
-                if (confirm('Are you sure you want to recreate all templates? This may overwrite existing templates.')) {
-                    fetch('/recreate-templates', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'}
-                    })
-                    .then(response => response.json())
-                    .then(data => {
-                        alert(data.message);
-                        location.reload();
-                    })
-                    .catch(error => {
-                        console.error('Error:', error);
-                        alert('An error occurred while recreating templates.');
-                    });
-                }
-            });
-        }
-        
-        // Initialize database button
-        const initDbBtn = document.getElementById('init-database-btn');
-        if (initDbBtn) {
-            initDbBtn.addEventListener('click', function() {
-                if (confirm('Are you sure you want to initialize the database? This may overwrite existing data.')) {
-                    fetch('/init-database', {
-                        method: 'POST',
-                        headers: {'Content-Type': 'application/json'}
-                    })
-                    .then(response => response.json())
-                    .then(data => {
-                        alert(data.message);
-                        location.reload();
-                    })
-                    .catch(error => {
-                        console.error('Error:', error);
-                        alert('An error occurred while initializing the database.');
-                    });
-                }
-            });
-        }
-    });
-</script>
-{% endblock %}""",
-
-            'infrastructure.html': """{% extends 'base.html' %}
+<script src="{{ static_v('js/diagnostic.js') }}" defer></script>
+{% endblock %}"""),
+    ('infrastructure.html', b"""{% extends 'base.html' %}
 
 {% block title %}Infrastructure Management - {{ app_name }}{% endblock %}
 
@@ -2043,10 +2599,17 @@ def generate_base_templates(app=None):
         }
         
         // Function to refresh infrastructure status
+        let statusEtag = null;
         function refreshInfrastructureStatus() {
-            fetch('/infrastructure/status')
-                .then(response => response.json())
+            fetch('/infrastructure/status', {headers: statusEtag ? {'If-None-Match': statusEtag} : {}})
+                .then(response => {
+                    // Unchanged since the last poll
+                    if (response.status === 304) return null;
+                    statusEtag = response.headers.get('ETag');
+                    return response.json();
+                })
                 .then(data => {
+                    if (!data) return;
                     // Update status fields
                     if (data.last_apply) {
                         document.getElementById('last-apply-time').innerText = formatTimestamp(data.last_apply);
@@ -2083,20 +2646,311 @@ def generate_base_templates(app=None):
                 });
         }
         
-        // Auto-refresh every 30 seconds if infrastructure changes are in progress
-        const autoRefresh = setInterval(refreshInfrastructureStatus, 30000);
+        // Auto-refresh every 30 seconds, skipping polls while the tab is in the background
+        const autoRefresh = setInterval(function() {
+            if (!document.hidden) refreshInfrastructureStatus();
+        }, 30000);
+        document.addEventListener('visibilitychange', function() {
+            if (!document.hidden) refreshInfrastructureStatus();
+        });
     });
 </script>
-{% endblock %}"""
-        }
+{% endblock %}"""),
+)
+
+def _asset_manifest(files):
+    """Build a {name: [size, digest]} manifest for generated template or static content"""
+    return {name: [len(content), hashlib.sha1(content).hexdigest()[:16]]
+            for name, content in files}
+
+def _manifest_matches(directory, manifest):
+    """Check whether the manifest recorded by the last generation run is unchanged"""
+    try:
+        with open(os.path.join(directory, ASSET_MANIFEST_NAME)) as f:
+            return json.load(f) == manifest
+    except (OSError, ValueError):
+        return False
+
+def _write_manifest(directory, manifest):
+    """Record which generated content has been materialized in a directory"""
+    _write_bytes(os.path.join(directory, ASSET_MANIFEST_NAME), json.dumps(manifest).encode('utf-8'))
+
+def _file_digest(path):
+    """SHA1 digest of a file on disk, or None if it cannot be read"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).digest()
+    except OSError:
+        return None
+
+def _write_bytes(path, data):
+    """Atomically write pre-encoded content with a single unbuffered write.
+    
+    The data goes to a temporary sibling first and is swapped into place with
+    os.replace, so a crash never leaves a truncated file behind.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _minify_static(filepath, content):
+    """Minify generated CSS/JS content when the minifiers are installed"""
+    if not MINIFIERS_AVAILABLE:
+        return content
+    if filepath.endswith('.css'):
+        return rcssmin.cssmin(content)
+    if filepath.endswith('.js'):
+        return rjsmin.jsmin(content)
+    return content
+
+# Inline the (small) main.css into base.html so first paint does not wait on it
+_CRITICAL_CSS = _minify_static('css/main.css', dict(_STATIC_FILES)['css/main.css']).strip()
+_TEMPLATES = tuple((name, content.replace(b'<!--CRITICAL_CSS-->', _CRITICAL_CSS))
+                   for name, content in _TEMPLATES)
+
+# Content never changes at runtime, so hash it once at import
+_STATIC_MANIFEST = _asset_manifest(_STATIC_FILES)
+
+# What generate_static_files writes, keyed by whether it minifies:
+# {minify: ((filepath, data, sha1 digest), ...)}, plus the directories it needs
+_STATIC_OUTPUTS = {
+    minify: tuple(
+        (filepath, data, hashlib.sha1(data).digest())
+        for filepath, data in ((filepath, _minify_static(filepath, content) if minify else content)
+                               for filepath, content in _STATIC_FILES)
+    )
+    for minify in (True, False)
+}
+_STATIC_DIRS = tuple(sorted({os.path.dirname(filepath) for filepath, _ in _STATIC_FILES}))
+
+# Bundled templates are served straight from memory by the app's Jinja loader
+_TEMPLATE_SOURCES = {name: content.decode('utf-8') for name, content in _TEMPLATES}
+_TEMPLATE_DIGEST = hashlib.sha1(json.dumps([_asset_manifest(_TEMPLATES), TEMPLATE_WHITESPACE_OPTIONS],
+                                            sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+# The encoded copies are only needed to derive the two values above; don't keep
+# a second copy of every template resident in each worker
+del _TEMPLATES
+
+def _write_precompressed(path):
+    """Write .gz (and .br when brotli is installed) companions next to a static file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    _write_bytes(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    if BROTLI_AVAILABLE:
+        _write_bytes(path + '.br', brotli.compress(data, quality=11))
+
+def serve_precompressed_static():
+    """Serve a .br/.gz companion for /static requests when the client accepts that encoding"""
+    if request.endpoint != 'static' or not request.view_args:
+        return None
+    
+    # Only files seen by build_static_versions are candidates, so there is
+    # no path handling or stat() on the request path
+    filename = request.view_args.get('filename', '')
+    entry = _PRECOMPRESSED.get(filename)
+    if entry is None:
+        return None
+    
+    mimetype, companions = entry
+    for encoding, path in companions:
+        if not request.accept_encodings[encoding]:
+            continue
         
-        # Create templates if they don't exist or are too small
-        for name, content in templates.items():
-            path = os.path.join(template_dir, name)
-            if not os.path.exists(path) or os.path.getsize(path) < 100:
-                with open(path, 'w') as f:
-                    f.write(content)
-                logger.info(f"Created/updated template: {name}")
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            conditional=True,
+            max_age=current_app.get_send_file_max_age(filename)
+        )
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+    return None
+
+def optimize_module_assets(app):
+    """Minify and precompress the CSS/JS other modules wrote into the static folder.
+    
+    Only run at build time (init-assets); the modules keep their generated
+    files once they exist, so the optimized versions are what ships.
+    """
+    bundled = {filepath for filepath, _ in _STATIC_FILES}
+    optimized = []
+    for root, _, files in os.walk(app.static_folder):
+        for name in files:
+            if not name.endswith(('.css', '.js')):
+                continue
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, app.static_folder).replace(os.sep, '/')
+            if filename in bundled:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+                data = _minify_static(filename, content)
+                if data != content:
+                    _write_bytes(path, data)
+                _write_precompressed(path)
+                optimized.append(filename)
+            except Exception as e:
+                logger.error(f"Error optimizing static file {filename}: {e}")
+    if optimized:
+        logger.info("Optimized module static files: %s", optimized)
+
+def build_static_versions(app):
+    """Fingerprint every file under the static folder for cache-busting URLs.
+    
+    Also records which files have compressed companions, so
+    serve_precompressed_static can pick one without touching the disk.
+    """
+    global _static_versions_digest
+    _STATIC_VERSIONS.clear()
+    _PRECOMPRESSED.clear()
+    try:
+        for root, _, files in os.walk(app.static_folder):
+            names = set(files)
+            for name in files:
+                if name.startswith('.') or name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, app.static_folder).replace(os.sep, '/')
+                digest = _file_digest(path)
+                if digest is None:
+                    # Unreadable right now; leave it unversioned rather than stop fingerprinting
+                    continue
+                _STATIC_VERSIONS[filename] = digest.hex()[:8]
+                
+                # Ignore companions older than the file itself (e.g. edited by hand)
+                mtime = os.stat(path).st_mtime
+                companions = tuple(
+                    (encoding, path + suffix)
+                    for encoding, suffix in (('br', '.br'), ('gzip', '.gz'))
+                    if name + suffix in names and os.stat(path + suffix).st_mtime >= mtime
+                )
+                if companions:
+                    mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                    _PRECOMPRESSED[filename] = (mimetype, companions)
+    except Exception as e:
+        logger.error(f"Error fingerprinting static files: {e}")
+    _static_versions_digest = hashlib.sha1(
+        json.dumps(_STATIC_VERSIONS, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def static_v(filename):
+    """Jinja global: static URL with a content version token"""
+    url = url_for('static', filename=filename)
+    version = _STATIC_VERSIONS.get(filename)
+    return f"{url}?v={version}" if version else url
+
+def cache_versioned_static(response):
+    """Give fingerprinted static responses a far-future, immutable Cache-Control"""
+    if request.endpoint == 'static' and 'v' in request.args and response.status_code in (200, 304):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('STATIC_VERSIONED_MAX_AGE', STATIC_VERSIONED_MAX_AGE)
+        response.cache_control.immutable = True
+    return response
+
+@contextmanager
+def _generation_lock(directory):
+    """Hold an exclusive lock on the directory while generated files are written"""
+    if not FCNTL_AVAILABLE:
+        yield
+        return
+    
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, GENERATION_LOCK_NAME), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _materialize_static(static_folder, existing, filepath, data, digest):
+    """Write one generated asset and its compressed companions; return whether it changed"""
+    full_path = os.path.join(static_folder, filepath)
+    
+    # Leave identical files untouched so their mtimes (and ETags) survive restarts
+    changed = _file_digest(full_path) != digest
+    if changed:
+        _write_bytes(full_path, data)
+    
+    # Precompress once here instead of on every request
+    if changed or filepath + '.gz' not in existing:
+        _write_precompressed(full_path)
+    return changed
+
+def generate_static_files(app, force=False):
+    """Generate CSS and JS files if they don't exist"""
+    # Repeat calls in the same process (reloaders, preload + init) are no-ops
+    if not force and app.static_folder in _GENERATED_STATIC_DIRS:
+        return
+    
+    # Keep readable sources in debug mode. The written bytes depend on this too,
+    # so it is part of the manifest and toggling DEBUG regenerates the files
+    minify = not app.config.get('DEBUG', False)
+    manifest = dict(_STATIC_MANIFEST, _minified=minify)
+    
+    try:
+        # Skip all per-file checks when the last run already wrote this content
+        if not force and _manifest_matches(app.static_folder, manifest):
+            _GENERATED_STATIC_DIRS.add(app.static_folder)
+            return
+        
+        with _generation_lock(app.static_folder):
+            # Another worker may have finished while we waited for the lock
+            if not force and _manifest_matches(app.static_folder, manifest):
+                _GENERATED_STATIC_DIRS.add(app.static_folder)
+                return
+            
+            # Create each parent directory once, derived from the asset paths, and
+            # list it once so existence checks below don't stat() every file
+            existing = set()
+            for directory in _STATIC_DIRS:
+                os.makedirs(os.path.join(app.static_folder, directory), exist_ok=True)
+                with os.scandir(os.path.join(app.static_folder, directory)) as entries:
+                    existing.update(os.path.join(directory, entry.name) for entry in entries)
+            
+            # The files are independent; overlap their writes and compression
+            outputs = _STATIC_OUTPUTS[minify]
+            with ThreadPoolExecutor(max_workers=len(outputs), thread_name_prefix='static') as executor:
+                changed = list(executor.map(
+                    lambda output: _materialize_static(app.static_folder, existing, *output), outputs))
+            created = [filepath for (filepath, _, _), was_changed in zip(outputs, changed) if was_changed]
+            
+            _write_manifest(app.static_folder, manifest)
+            if created:
+                logger.info("Created static files: %s", created)
+        _GENERATED_STATIC_DIRS.add(app.static_folder)
+    except Exception as e:
+        logger.error(f"Error generating static files: {e}")
+
+def generate_base_templates(app=None, force=False):
+    """Ensure the templates directory exists for module and override templates.
+    
+    The bundled templates themselves are never written to disk; they are
+    served from memory by the loader set up in configure_template_loader.
+    """
+    try:
+        # Use current_app if app is not provided
+        if app is None:
+            app = current_app
+            
+        # Create templates directory
+        template_dir = app.template_folder
+        if not os.path.isabs(template_dir):
+            template_dir = os.path.join(app.root_path, template_dir)
+            
+        os.makedirs(template_dir, exist_ok=True)
     except Exception as e:
-        logger.error(f"Error generating templates: {e}\n{traceback.format_exc()}")
+        logger.error("Error generating templates: %s", e, exc_info=True)
         raise